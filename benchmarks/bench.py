@@ -0,0 +1,177 @@
+"""
+Banc de mesure des chemins critiques de l'application, sur une FausseFeuille en mémoire.
+
+Utilisation (depuis la racine du dépôt) :
+    python -m benchmarks.bench                               # 500 clients × 10 interventions
+    python -m benchmarks.bench --clients 2000 --interventions 30 --latence 0.2
+
+Scénarios : chargement (charger_donnees), recherche, rerun_recherche (chargement + recherche,
+soit le coût d'un rerun de la page de recherche), ajout_intervention et mise_a_jour_client.
+Pour chacun : durée médiane / min par opération, nombre d'appels API par opération et erreurs de quota
+(simulées avec --quota-lecture / --quota-ecriture / --taux-erreur-quota ; une opération refusée est comptée, pas chronométrée).
+
+Chaque exécution est ajoutée à benchmarks/resultats.jsonl puis comparée à la dernière
+exécution ayant les mêmes paramètres : une durée médiane qui augmente de plus de --seuil
+ou un appel API supplémentaire par opération est signalé comme régression
+(code retour 1 avec --echec-si-regression, pour une CI).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import donnees
+from benchmarks.generateurs import creer_feuille, DATE_REFERENCE
+from instrumentation import est_erreur_quota
+
+FICHIER_RESULTATS = os.path.join(os.path.dirname(__file__), "resultats.jsonl")
+TERMES_RECHERCHE = ["martin", "lyon", "chaudiere", "0612", "zzz-introuvable"]
+
+
+# --- SCÉNARIOS ---
+# Chaque scénario reçoit (sheet, db, i) et réalise UNE opération ; db est chargé une fois avant les mesures.
+
+def scenario_chargement(sheet, db, i):
+    donnees.charger_donnees(sheet)
+
+def scenario_recherche(sheet, db, i):
+    donnees.rechercher_clients(db, TERMES_RECHERCHE[i % len(TERMES_RECHERCHE)])
+
+def scenario_rerun_recherche(sheet, db, i):
+    db_rerun = donnees.charger_donnees(sheet)
+    donnees.rechercher_clients(db_rerun, TERMES_RECHERCHE[i % len(TERMES_RECHERCHE)])
+
+def scenario_ajout_intervention(sheet, db, i):
+    cles = sorted(db.keys())
+    inter = {"date": str(DATE_REFERENCE), "type": "Dépannage", "techniciens": ["Seb"],
+             "desc": f"Intervention de mesure {i}", "prix": 120.0, "fichiers_inter": ""}
+    donnees.ajouter_inter_sheet(sheet, cles[i % len(cles)], db, inter)
+
+def scenario_mise_a_jour_client(sheet, db, i):
+    client = db[sorted(db.keys())[i % len(db)]]
+    donnees.mettre_a_jour_client(
+        sheet, client['nom'], f"{i} avenue du Test", client['ville'], client['code_postal'],
+        client['telephone'], client['email'], client['equipement'], client['fichiers_client']
+    )
+
+SCENARIOS = {
+    "chargement": scenario_chargement,
+    "recherche": scenario_recherche,
+    "rerun_recherche": scenario_rerun_recherche,
+    "ajout_intervention": scenario_ajout_intervention,
+    "mise_a_jour_client": scenario_mise_a_jour_client,
+}
+
+
+# --- MESURE ---
+
+def mesurer(nom_scenario, n_clients, m_interventions, repetitions, **options_classeur):
+    """Exécute un scénario sur une feuille neuve et retourne ses statistiques."""
+    sheet = creer_feuille(n_clients, m_interventions, **options_classeur)
+    db = donnees.charger_donnees(sheet)
+    sheet.spreadsheet.reinitialiser_compteurs()
+
+    scenario = SCENARIOS[nom_scenario]
+    durees, erreurs_quota = [], 0
+    for i in range(repetitions):
+        debut = time.perf_counter()
+        try:
+            scenario(sheet, db, i)
+        except Exception as e:
+            if not est_erreur_quota(e):
+                raise
+            erreurs_quota += 1
+            continue
+        durees.append(time.perf_counter() - debut)
+
+    appels = sheet.spreadsheet.appels
+    return {
+        "mediane_ms": round(statistics.median(durees) * 1000, 3) if durees else None,
+        "min_ms": round(min(durees) * 1000, 3) if durees else None,
+        "appels_par_op": round(sum(appels.values()) / repetitions, 2),
+        "erreurs_quota": erreurs_quota,
+        "appels_api": dict(appels),
+    }
+
+def commit_courant():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# --- SUIVI DANS LE TEMPS ---
+
+def derniere_execution(parametres):
+    """Dernière exécution enregistrée avec les mêmes paramètres, ou None."""
+    if not os.path.exists(FICHIER_RESULTATS):
+        return None
+    precedente = None
+    with open(FICHIER_RESULTATS, encoding="utf-8") as f:
+        for ligne in f:
+            if ligne.strip():
+                execution = json.loads(ligne)
+                if execution.get("parametres") == parametres:
+                    precedente = execution
+    return precedente
+
+def detecter_regressions(resultats, precedente, seuil):
+    """Liste des régressions (textes) par rapport à l'exécution précédente."""
+    regressions = []
+    for nom, stats in resultats.items():
+        avant = precedente["resultats"].get(nom)
+        if avant is None:
+            continue
+        if stats["mediane_ms"] is not None and avant.get("mediane_ms") is not None \
+                and stats["mediane_ms"] > avant["mediane_ms"] * (1 + seuil):
+            regressions.append(f"{nom} : {avant['mediane_ms']} ms -> {stats['mediane_ms']} ms")
+        if stats["appels_par_op"] > avant["appels_par_op"]:
+            regressions.append(f"{nom} : {avant['appels_par_op']} -> {stats['appels_par_op']} appels API / op")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mesure des chemins critiques de SEBApp sur une fausse feuille.")
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--interventions", type=int, default=10, help="interventions par client")
+    parser.add_argument("--repetitions", type=int, default=20)
+    parser.add_argument("--latence", type=float, default=0.0, help="latence simulée par appel API (s)")
+    parser.add_argument("--quota-lecture", type=int, default=None, help="lectures max par minute (défaut : illimité)")
+    parser.add_argument("--quota-ecriture", type=int, default=None, help="écritures max par minute (défaut : illimité)")
+    parser.add_argument("--taux-erreur-quota", type=float, default=0.0, help="probabilité (0..1) qu'un appel échoue en 429")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--seuil", type=float, default=0.25, help="hausse relative de la médiane considérée comme régression")
+    parser.add_argument("--sans-enregistrement", action="store_true", help="ne pas ajouter l'exécution à resultats.jsonl")
+    parser.add_argument("--echec-si-regression", action="store_true")
+    args = parser.parse_args(argv)
+
+    parametres = {"clients": args.clients, "interventions": args.interventions,
+                  "repetitions": args.repetitions, "latence": args.latence, "quota_lecture": args.quota_lecture,
+                  "quota_ecriture": args.quota_ecriture, "taux_erreur_quota": args.taux_erreur_quota}
+    options_classeur = {"latence": args.latence, "quota_lecture_par_minute": args.quota_lecture,
+                        "quota_ecriture_par_minute": args.quota_ecriture, "taux_erreur_quota": args.taux_erreur_quota}
+    resultats = {}
+    print(f"{'scénario':<22}{'médiane (ms)':>14}{'min (ms)':>12}{'appels/op':>12}{'erreurs 429':>13}")
+    for nom in args.scenarios:
+        resultats[nom] = mesurer(nom, args.clients, args.interventions, args.repetitions, **options_classeur)
+        stats = resultats[nom]
+        print(f"{nom:<22}{str(stats['mediane_ms']):>14}{str(stats['min_ms']):>12}{stats['appels_par_op']:>12}{stats['erreurs_quota']:>13}")
+
+    precedente = derniere_execution(parametres)
+    regressions = detecter_regressions(resultats, precedente, args.seuil) if precedente else []
+    for regression in regressions:
+        print(f"RÉGRESSION {regression}")
+
+    if not args.sans_enregistrement:
+        execution = {"date": datetime.now().isoformat(timespec="seconds"), "commit": commit_courant(),
+                     "parametres": parametres, "resultats": resultats}
+        with open(FICHIER_RESULTATS, "a", encoding="utf-8") as f:
+            f.write(json.dumps(execution, ensure_ascii=False) + "\n")
+
+    return 1 if regressions and args.echec_si_regression else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+"""
+Test de charge : plusieurs sessions simultanées (techniciens, secrétariat) sur une FausseFeuille partagée.
+
+Streamlit exécute le script de chaque session dans un thread du même processus : on simule donc
+chaque session par un thread qui enchaîne des actions réalistes, chacune faite d'un ou plusieurs reruns
+(un rerun = charger_donnees + le travail de la page, comme dans gestion.py) :
+    recherche          : 1 rerun (chargement + recherche)
+    ouvrir_client      : 1 rerun (chargement + fiche client)
+    ajout_intervention : 2 reruns (écriture, puis st.rerun qui recharge)
+    modifier_client    : 2 reruns (écriture, puis st.rerun qui recharge)
+
+Utilisation (depuis la racine du dépôt) :
+    python -m benchmarks.charge --sessions 1 5 10 20 --duree 20 --latence 0.3
+
+Pour chaque palier de sessions : débit, latence p50 / p99 des reruns, appels API par action,
+erreurs de quota et appels API par minute (à comparer au quota Sheets, partagé par toutes les
+sessions puisqu'elles utilisent le même compte de service).
+"""
+import argparse
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import donnees
+from benchmarks.generateurs import creer_feuille
+from instrumentation import (
+    Mesures, FeuilleInstrumentee, est_erreur_quota, METHODES_LECTURE, QUOTA_LECTURE_PAR_MINUTE, QUOTA_ECRITURE_PAR_MINUTE
+)
+
+# Répartition des actions (poids relatifs) : surtout de la consultation
+ACTIONS = {"recherche": 50, "ouvrir_client": 30, "ajout_intervention": 12, "modifier_client": 8}
+TERMES_RECHERCHE = ["martin", "lyon", "chaudiere", "pac", "dubois", "0612"]
+
+
+def percentile(valeurs, p):
+    """Percentile par rang le plus proche (valeurs non vide)."""
+    triees = sorted(valeurs)
+    rang = max(0, math.ceil(p / 100 * len(triees)) - 1)
+    return triees[rang]
+
+
+class Session(threading.Thread):
+    """Une session utilisateur : enchaîne des actions jusqu'à la date de fin."""
+
+    def __init__(self, numero, feuille, fin, reflexion, graine):
+        super().__init__(name=f"session-{numero}", daemon=True)
+        self.mesures = Mesures(session=f"s{numero}")
+        self.sheet = FeuilleInstrumentee(feuille, self.mesures)
+        self.fin = fin
+        self.reflexion = reflexion
+        self.aleatoire = random.Random(graine)
+        self.latences_rerun = defaultdict(list)   # action -> durées (s) de chaque rerun
+        self.appels_par_action = defaultdict(list)
+        self.erreurs = defaultdict(int)
+
+    def rerun(self, action, travail=None):
+        """
+        Un rerun de la page : rechargement complet de la feuille, puis le travail propre à la page.
+        La durée est enregistrée même si le rerun échoue (ex. quota 429) : ce sont souvent les plus lents.
+        """
+        debut = time.perf_counter()
+        try:
+            db = donnees.charger_donnees(self.sheet)
+            if travail is not None:
+                travail(db)
+            return db
+        finally:
+            self.latences_rerun[action].append(time.perf_counter() - debut)
+
+    def executer(self, action):
+        if action == "recherche":
+            terme = self.aleatoire.choice(TERMES_RECHERCHE)
+            self.rerun(action, lambda db: donnees.rechercher_clients(db, terme))
+        elif action == "ouvrir_client":
+            self.rerun(action, lambda db: db[self.aleatoire.choice(sorted(db))]['historique'])
+        elif action == "ajout_intervention":
+            def ajouter(db):
+                inter = {"date": datetime.now().strftime("%Y-%m-%d"), "type": "Entretien annuel",
+                         "techniciens": ["Seb"], "desc": "Test de charge", "prix": 150.0, "fichiers_inter": ""}
+                donnees.ajouter_inter_sheet(self.sheet, self.aleatoire.choice(sorted(db)), db, inter)
+            self.rerun(action, ajouter)
+            self.rerun(action)
+        elif action == "modifier_client":
+            def modifier(db):
+                client = db[self.aleatoire.choice(sorted(db))]
+                donnees.mettre_a_jour_client(
+                    self.sheet, client['nom'], client['adresse'], client['ville'], client['code_postal'],
+                    client['telephone'], client['email'], client['equipement'], client['fichiers_client']
+                )
+            self.rerun(action, modifier)
+            self.rerun(action)
+
+    def run(self):
+        noms, poids = list(ACTIONS), list(ACTIONS.values())
+        while time.monotonic() < self.fin:
+            action = self.aleatoire.choices(noms, poids)[0]
+            appels_avant = self.mesures.total_appels
+            try:
+                self.executer(action)
+            except Exception as e:
+                self.erreurs["quota" if est_erreur_quota(e) else type(e).__name__] += 1
+            self.appels_par_action[action].append(self.mesures.total_appels - appels_avant)
+            if self.reflexion:
+                time.sleep(self.aleatoire.uniform(0, 2 * self.reflexion))
+
+
+def palier(nb_sessions, args):
+    """Lance nb_sessions sessions simultanées pendant args.duree secondes et agrège leurs mesures."""
+    feuille = creer_feuille(args.clients, args.interventions, latence=args.latence, gigue=args.latence / 2,
+                            quota_lecture_par_minute=args.quota_lecture, quota_ecriture_par_minute=args.quota_ecriture)
+    fin = time.monotonic() + args.duree
+    sessions = [Session(i, feuille, fin, args.reflexion, graine=i) for i in range(nb_sessions)]
+    debut = time.perf_counter()
+    for session in sessions:
+        session.start()
+    for session in sessions:
+        session.join()
+    duree = time.perf_counter() - debut
+
+    latences, appels, erreurs = defaultdict(list), defaultdict(list), defaultdict(int)
+    for session in sessions:
+        for action, valeurs in session.latences_rerun.items():
+            latences[action] += valeurs
+        for action, valeurs in session.appels_par_action.items():
+            appels[action] += valeurs
+        for nature, n in session.erreurs.items():
+            erreurs[nature] += n
+
+    toutes_latences = [l for valeurs in latences.values() for l in valeurs]
+    nb_actions = sum(len(valeurs) for valeurs in appels.values())
+    total_appels = sum(sum(valeurs) for valeurs in appels.values())
+    lectures = sum(stats["n"] for session in sessions for methode, stats in session.mesures.appels.items()
+                   if methode in METHODES_LECTURE)
+    ecritures = sum(stats["n"] for session in sessions for stats in session.mesures.appels.values()) - lectures
+    return {
+        "sessions": nb_sessions,
+        "actions_par_s": nb_actions / duree,
+        "reruns_par_s": len(toutes_latences) / duree,
+        "p50_ms": percentile(toutes_latences, 50) * 1000 if toutes_latences else None,
+        "p99_ms": percentile(toutes_latences, 99) * 1000 if toutes_latences else None,
+        "appels_par_min": total_appels / duree * 60,
+        "lectures_par_min": lectures / duree * 60,
+        "ecritures_par_min": ecritures / duree * 60,
+        "appels_par_action": {action: sum(valeurs) / len(valeurs) for action, valeurs in appels.items()},
+        "latences_par_action": {action: (percentile(v, 50) * 1000, percentile(v, 99) * 1000) for action, v in latences.items()},
+        "erreurs": dict(erreurs),
+    }
+
+def afficher(resultat):
+    p50 = f"{resultat['p50_ms']:.1f}" if resultat['p50_ms'] is not None else "-"
+    p99 = f"{resultat['p99_ms']:.1f}" if resultat['p99_ms'] is not None else "-"
+    erreurs = sum(resultat['erreurs'].values())
+    print(f"{resultat['sessions']:>8}{resultat['actions_par_s']:>12.1f}{resultat['reruns_par_s']:>12.1f}"
+          f"{p50:>10}{p99:>10}{resultat['appels_par_min']:>14.0f}{erreurs:>9}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Test de charge multi-sessions de SEBApp sur une fausse feuille.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 5, 10, 20], help="paliers de sessions simultanées")
+    parser.add_argument("--duree", type=float, default=10.0, help="durée de chaque palier (s)")
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--interventions", type=int, default=10, help="interventions par client")
+    parser.add_argument("--latence", type=float, default=0.2, help="latence simulée par appel API (s)")
+    parser.add_argument("--reflexion", type=float, default=1.0, help="temps de réflexion moyen entre deux actions (s)")
+    parser.add_argument("--quota-lecture", type=int, default=None,
+                        help=f"lectures max par minute (simule le quota Sheets, {QUOTA_LECTURE_PAR_MINUTE} en réalité ; défaut : illimité)")
+    parser.add_argument("--quota-ecriture", type=int, default=None,
+                        help=f"écritures max par minute (simule le quota Sheets, {QUOTA_ECRITURE_PAR_MINUTE} en réalité ; défaut : illimité)")
+    args = parser.parse_args(argv)
+
+    resultats = []
+    print(f"{'sessions':>8}{'actions/s':>12}{'reruns/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'appels/min':>14}{'erreurs':>9}")
+    for nb_sessions in args.sessions:
+        resultats.append(palier(nb_sessions, args))
+        afficher(resultats[-1])
+
+    dernier = resultats[-1]
+    print(f"\nDétail à {dernier['sessions']} session(s) :")
+    for action in ACTIONS:
+        if action in dernier['appels_par_action']:
+            p50, p99 = dernier['latences_par_action'].get(action, (0, 0))
+            print(f"  {action:<20} {dernier['appels_par_action'][action]:>5.1f} appels API / action"
+                  f"   rerun p50 {p50:.1f} ms, p99 {p99:.1f} ms")
+    if dernier['erreurs']:
+        print(f"  erreurs : {dernier['erreurs']}")
+    for cle, quota, libelle in (("lectures_par_min", QUOTA_LECTURE_PAR_MINUTE, "lectures"),
+                                ("ecritures_par_min", QUOTA_ECRITURE_PAR_MINUTE, "écritures")):
+        for resultat in resultats:
+            if resultat[cle] > quota:
+                print(f"\nLe quota Sheets ({quota} {libelle} / min / utilisateur) est dépassé "
+                      f"dès {resultat['sessions']} session(s) : {resultat[cle]:.0f} {libelle} / min.")
+                break
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Fausse feuille gspread en mémoire, pour mesurer l'application sans toucher au vrai classeur.
+
+FausseFeuille implémente les méthodes de gspread.Worksheet utilisées par donnees.py
+(get_all_records, find, update_cell, append_row, append_rows, batch_update, delete_rows, title, spreadsheet)
+avec une latence réseau simulée et des erreurs de quota injectables.
+Chaque appel est compté dans FauxClasseur.appels (partagé par toutes les feuilles du classeur).
+"""
+import random
+import re
+import threading
+import time
+from collections import Counter, deque, namedtuple
+
+from instrumentation import METHODES_ECRITURE
+
+# Équivalent minimal de gspread.Cell (seuls row, col et value sont utilisés)
+Cellule = namedtuple("Cellule", ["row", "col", "value"])
+
+
+class ErreurQuota(Exception):
+    """Simule l'erreur 429 'Quota exceeded' renvoyée par l'API Google Sheets."""
+    code = 429
+
+
+class FauxClasseur:
+    """
+    Classeur en mémoire (équivalent de gspread.Spreadsheet).
+    latence : secondes ajoutées à chaque appel API (plus un aléa de +/- gigue secondes).
+    quota_lecture_par_minute, quota_ecriture_par_minute : nombre max de lectures / d'écritures sur 60 s glissantes
+    (None = illimité). Comme dans Google Sheets, les deux quotas sont comptés séparément
+    (classement des méthodes : instrumentation.METHODES_ECRITURE).
+    taux_erreur_quota : probabilité (0..1) qu'un appel échoue en ErreurQuota, indépendamment du débit.
+    """
+
+    def __init__(self, latence=0.0, gigue=0.0, quota_lecture_par_minute=None, quota_ecriture_par_minute=None,
+                 taux_erreur_quota=0.0, graine=None):
+        self.latence = latence
+        self.gigue = gigue
+        self.quotas = {"lecture": quota_lecture_par_minute, "ecriture": quota_ecriture_par_minute}
+        self.taux_erreur_quota = taux_erreur_quota
+        self.appels = Counter()
+        self.erreurs_quota = 0
+        self._feuilles = []
+        self._horodatages = {"lecture": deque(), "ecriture": deque()}
+        self._aleatoire = random.Random(graine)
+        self._verrou = threading.Lock()
+
+    def appel_api(self, methode):
+        """Compte un appel, applique le quota (lecture ou écriture) puis la latence simulée."""
+        type_quota = "ecriture" if methode in METHODES_ECRITURE else "lecture"
+        with self._verrou:
+            self.appels[methode] += 1
+            maintenant = time.monotonic()
+            horodatages, quota = self._horodatages[type_quota], self.quotas[type_quota]
+            while horodatages and maintenant - horodatages[0] > 60:
+                horodatages.popleft()
+            depasse = quota is not None and len(horodatages) >= quota
+            if depasse or self._aleatoire.random() < self.taux_erreur_quota:
+                self.erreurs_quota += 1
+                raise ErreurQuota(f"Quota exceeded ({methode})")
+            horodatages.append(maintenant)
+            attente = self.latence + (self._aleatoire.uniform(-self.gigue, self.gigue) if self.gigue else 0.0)
+        if attente > 0:
+            time.sleep(attente)
+
+    def reinitialiser_compteurs(self):
+        with self._verrou:
+            self.appels.clear()
+            self.erreurs_quota = 0
+            for horodatages in self._horodatages.values():
+                horodatages.clear()
+
+    @property
+    def sheet1(self):
+        return self._feuilles[0]
+
+    def worksheets(self):
+        self.appel_api("worksheets")
+        return list(self._feuilles)
+
+    def worksheet(self, titre):
+        for feuille in self.worksheets():
+            if feuille.title == titre:
+                return feuille
+        raise KeyError(titre)
+
+    def add_worksheet(self, title, rows=100, cols=26):
+        self.appel_api("add_worksheet")
+        return self.ajouter_feuille(title, [])
+
+    def ajouter_feuille(self, titre, valeurs):
+        """Ajoute une feuille pré-remplie (sans compter d'appel API) : sert à préparer les jeux de données."""
+        feuille = FausseFeuille(self, titre, valeurs)
+        self._feuilles.append(feuille)
+        return feuille
+
+
+class FausseFeuille:
+    """Feuille en mémoire : liste de lignes, la première étant l'en-tête (comme dans Google Sheets)."""
+
+    def __init__(self, classeur, titre, valeurs):
+        self.spreadsheet = classeur
+        self.title = titre
+        self._valeurs = [list(ligne) for ligne in valeurs]
+        self._verrou = threading.Lock()
+
+    def get_all_records(self):
+        self.spreadsheet.appel_api("get_all_records")
+        with self._verrou:
+            if not self._valeurs:
+                return []
+            entetes = self._valeurs[0]
+            return [
+                {entete: (ligne[i] if i < len(ligne) else '') for i, entete in enumerate(entetes)}
+                for ligne in self._valeurs[1:]
+            ]
+
+    def find(self, query):
+        """Première cellule (parcours ligne par ligne) dont la valeur est exactement query, ou None."""
+        self.spreadsheet.appel_api("find")
+        with self._verrou:
+            for num_ligne, ligne in enumerate(self._valeurs, start=1):
+                for num_col, valeur in enumerate(ligne, start=1):
+                    if str(valeur) == str(query):
+                        return Cellule(num_ligne, num_col, valeur)
+        return None
+
+    def update_cell(self, row, col, value):
+        self.spreadsheet.appel_api("update_cell")
+        self._ecrire(row, col, value)
+
+    def append_row(self, values):
+        self.spreadsheet.appel_api("append_row")
+        with self._verrou:
+            self._valeurs.append(list(values))
+
+    def append_rows(self, values):
+        self.spreadsheet.appel_api("append_rows")
+        with self._verrou:
+            self._valeurs.extend(list(ligne) for ligne in values)
+
+    def batch_update(self, data):
+        """Plusieurs plages A1 en un seul appel : [{"range": "I5", "values": [[...]]}, ...]."""
+        self.spreadsheet.appel_api("batch_update")
+        for plage in data:
+            lettres, ligne = re.fullmatch(r"([A-Z]+)(\d+)", plage["range"].split(":")[0]).groups()
+            col = 0
+            for lettre in lettres:
+                col = col * 26 + ord(lettre) - ord('A') + 1
+            for i, valeurs in enumerate(plage["values"]):
+                for j, valeur in enumerate(valeurs):
+                    self._ecrire(int(ligne) + i, col + j, valeur)
+
+    def _ecrire(self, row, col, value):
+        with self._verrou:
+            while len(self._valeurs) < row:
+                self._valeurs.append([])
+            ligne = self._valeurs[row - 1]
+            while len(ligne) < col:
+                ligne.append('')
+            ligne[col - 1] = value
+
+    def delete_rows(self, start_index, end_index=None):
+        self.spreadsheet.appel_api("delete_rows")
+        with self._verrou:
+            del self._valeurs[start_index - 1:(end_index or start_index)]
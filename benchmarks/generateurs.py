@@ -0,0 +1,62 @@
+"""
+Générateurs de données synthétiques : N clients × M interventions, au format de la feuille "Base Clients Chauffage".
+Les données sont reproductibles (graine fixe) pour que deux mesures soient comparables.
+"""
+import json
+import random
+from datetime import date, timedelta
+
+from benchmarks.fausse_feuille import FauxClasseur
+
+ENTETES = ["Nom", "Prenom", "Adresse", "Ville", "Code_Postal", "Telephone", "Email", "Equipement", "Historique", "Fichiers_Client"]
+
+NOMS = ["Martin", "Bernard", "Dubois", "Thomas", "Robert", "Richard", "Petit", "Durand", "Leroy", "Moreau",
+        "Simon", "Laurent", "Lefebvre", "Michel", "Garcia", "David", "Bertrand", "Roux", "Vincent", "Fournier"]
+PRENOMS = ["Jean", "Marie", "Pierre", "Sophie", "Luc", "Claire", "Paul", "Julie", "Louis", "Emma"]
+VILLES = [("Lyon", "69000"), ("Villeurbanne", "69100"), ("Vienne", "38200"), ("Bron", "69500"), ("Givors", "69700")]
+EQUIPEMENTS = ["Chaudière gaz", "Chaudière fioul", "PAC air/eau", "Poêle à granulés", "Chauffe-eau thermodynamique"]
+TYPES = ["Entretien annuel", "Dépannage", "Installation", "Devis", "Visite technique"]
+TECHNICIENS = [["Seb"], ["Colin"], ["Seb", "Colin"]]
+# Date fixe (et non date.today()) : le même jeu de données d'un jour à l'autre, donc des mesures comparables
+DATE_REFERENCE = date(2025, 1, 1)
+
+
+def generer_intervention(aleatoire, date_debut, nb_jours):
+    jour = date_debut + timedelta(days=aleatoire.randrange(nb_jours))
+    return {
+        "date": str(jour),
+        "type": aleatoire.choice(TYPES),
+        "techniciens": aleatoire.choice(TECHNICIENS),
+        "desc": "Contrôle combustion, nettoyage corps de chauffe, vérification sécurité. " * aleatoire.randint(1, 3),
+        "prix": float(aleatoire.choice([90, 120, 150, 280, 1450])),
+        "fichiers_inter": ""
+    }
+
+
+def generer_lignes(n_clients, m_interventions, graine=42, annees=5):
+    """
+    Retourne les lignes de la feuille (en-tête compris) : n_clients clients ayant chacun
+    m_interventions interventions réparties sur les `annees` années précédant DATE_REFERENCE.
+    Chaque Nom est unique : les modifications unitaires retrouvent encore la ligne par sheet.find(nom)
+    (l'archivage, lui, compare Nom + Prénom ; voir tests/test_archivage.py pour les homonymes).
+    """
+    aleatoire = random.Random(graine)
+    date_debut = DATE_REFERENCE - timedelta(days=365 * annees)
+    lignes = [list(ENTETES)]
+    for i in range(n_clients):
+        nom = f"{aleatoire.choice(NOMS)}{i:05d}"
+        prenom = aleatoire.choice(PRENOMS)
+        ville, code_postal = aleatoire.choice(VILLES)
+        historique = [generer_intervention(aleatoire, date_debut, 365 * annees) for _ in range(m_interventions)]
+        lignes.append([
+            nom, prenom, f"{aleatoire.randint(1, 200)} rue des Lilas", ville, code_postal,
+            f"06{aleatoire.randint(10000000, 99999999)}", f"{nom.lower()}@exemple.fr",
+            aleatoire.choice(EQUIPEMENTS), json.dumps(historique, ensure_ascii=False), ""
+        ])
+    return lignes
+
+
+def creer_feuille(n_clients, m_interventions, graine=42, **options_classeur):
+    """Crée un FauxClasseur rempli et retourne sa première feuille (équivalent de connexion_google_sheet())."""
+    classeur = FauxClasseur(graine=graine, **options_classeur)
+    return classeur.ajouter_feuille("Feuille 1", generer_lignes(n_clients, m_interventions, graine))
@@ -0,0 +1,406 @@
+"""
+Cœur de données de SEBApp : modèle client/interventions et opérations sur la feuille Google Sheets.
+
+Ce module ne dépend PAS de Streamlit et n'a aucun effet de bord à l'import :
+la connexion n'est ouverte qu'au premier appel de obtenir_feuille() / connexion_google_sheet().
+Il peut donc être réutilisé par la page Streamlit (gestion.py), un script batch, une CLI ou un benchmark.
+
+Les fonctions d'écriture lèvent des exceptions en cas d'erreur : c'est à l'appelant
+(interface, script...) de décider comment les afficher.
+"""
+import json
+import re # Nettoyage des index de recherche
+import uuid
+
+# --- CONSTANTES GOOGLE SHEETS ---
+NOM_CLASSEUR = "Base Clients Chauffage"
+SCOPE = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+FICHIER_SECRETS = "secrets.json"
+
+# L'ordre des colonnes est : Nom, Prenom, Adresse, Ville, CP, Tel, Email, Equipement, Historique (9), Fichiers_Client (10)
+COL_ADRESSE = 3
+COL_VILLE = 4
+COL_CODE_POSTAL = 5
+COL_TELEPHONE = 6
+COL_EMAIL = 7
+COL_EQUIPEMENT = 8
+COL_HISTORIQUE = 9
+COL_FICHIERS_CLIENT = 10
+
+# --- ARCHIVES ---
+# Les interventions anciennes sont déplacées dans une feuille par année ("Archive_2023", ...)
+ARCHIVE_PREFIXE = "Archive_"
+ARCHIVE_ENTETES = ["Nom", "Prenom", "Historique"]
+# Nombre d'années (année en cours comprise) conservées par défaut dans la feuille principale
+ARCHIVE_ANNEES_CONSERVEES = 2
+
+
+# --- CONNEXION (paresseuse) ---
+
+def connexion_google_sheet(creds_dict=None, fichier_secrets=FICHIER_SECRETS):
+    """
+    Ouvre la première feuille du classeur NOM_CLASSEUR.
+    creds_dict : identifiants du compte de service (ex. st.secrets["gcp_service_account"]) ;
+    à défaut, le fichier 'secrets.json' local est utilisé.
+    """
+    # Imports locaux : charger ce module ne doit pas coûter l'import de gspread / oauth2client
+    import gspread
+    from oauth2client.service_account import ServiceAccountCredentials
+
+    if creds_dict is not None:
+        creds = ServiceAccountCredentials.from_json_keyfile_dict(dict(creds_dict), SCOPE)
+    else:
+        creds = ServiceAccountCredentials.from_json_keyfile_name(fichier_secrets, SCOPE)
+
+    client = gspread.authorize(creds)
+    return client.open(NOM_CLASSEUR).sheet1
+
+_feuille = None
+
+def obtenir_feuille(creds_dict=None):
+    """Retourne la feuille principale, en ouvrant la connexion au premier appel seulement."""
+    global _feuille
+    if _feuille is None:
+        _feuille = connexion_google_sheet(creds_dict)
+    return _feuille
+
+
+# --- LECTURE ---
+
+def decoder_historique(texte):
+    """L'historique est stocké sous forme de texte codé (JSON), on le décode (liste vide si illisible)."""
+    if not texte:
+        return []
+    try:
+        return json.loads(texte)
+    except:
+        return []
+
+def nettoyer_recherche(texte):
+    """Minuscules et suppression des caractères spéciaux (même traitement pour l'index et le terme cherché)."""
+    return re.sub(r'[^a-z0-9\s]', '', str(texte).lower())
+
+def charger_donnees(sheet):
+    """Lit toute la feuille et retourne {nom_complet: client_data}."""
+    # Récupère toutes les lignes du tableau
+    lignes = sheet.get_all_records()
+    db = {}
+    for ligne in lignes:
+        nom_complet = f"{ligne.get('Nom', '')} {ligne.get('Prenom', '')}".strip()
+        if nom_complet: # S'assurer que le client a un nom
+            historique = decoder_historique(ligne.get('Historique'))
+
+            # Stockage de TOUS les champs
+            client_data = {
+                "nom": ligne.get('Nom', ''),
+                "prenom": ligne.get('Prenom', ''),
+                "adresse": ligne.get('Adresse', ''),
+                "ville": ligne.get('Ville', ''),
+                "code_postal": ligne.get('Code_Postal', ''),
+                "telephone": ligne.get('Telephone', ''),
+                "email": ligne.get('Email', ''),
+                "equipement": ligne.get('Equipement', ''),
+                "fichiers_client": ligne.get('Fichiers_Client', ''), # Doit exister dans l'en-tête de votre Google Sheet
+                "historique": historique
+            }
+
+            # Créer un index de recherche pour tous les champs pertinents
+            index_fields = [
+                client_data["nom"], client_data["prenom"], client_data["adresse"],
+                client_data["ville"], client_data["code_postal"], client_data["telephone"],
+                client_data["email"], client_data["equipement"], client_data["fichiers_client"]
+            ]
+
+            # Concaténation des champs puis nettoyage
+            client_data["recherche_index"] = nettoyer_recherche(" ".join(str(f) for f in index_fields if f))
+
+            db[nom_complet] = client_data
+
+            # Stocker aussi le nom complet (clé d'accès au dictionnaire) pour l'utiliser dans les fonctions de mise à jour
+            client_data["nom_complet"] = nom_complet
+
+    return db
+
+def rechercher_clients(db, recherche):
+    """
+    Retourne la liste des noms complets correspondant au terme recherché.
+    Terme vide : tous les clients, par ordre alphabétique.
+    """
+    if not recherche:
+        return sorted(db.keys())
+
+    search_term = nettoyer_recherche(recherche).strip()
+    if not search_term:
+        return []
+    # On cherche si le terme de recherche se trouve n'importe où dans l'index de recherche
+    return [nom_complet for nom_complet, client_data in db.items() if search_term in client_data['recherche_index']]
+
+
+# --- ÉCRITURE ---
+
+def ajouter_nouveau_client_sheet(sheet, nom, prenom, adresse, ville, code_postal, tel, email, equipement, fichiers_client):
+    nouvelle_ligne = [
+        nom, prenom, adresse, ville, code_postal, tel, email, equipement,
+        "[]",
+        fichiers_client
+    ]
+    sheet.append_row(nouvelle_ligne)
+
+# Fonction générique pour mettre à jour un champ unique dans la ligne d'un client
+def update_client_field(sheet, nom_client_principal, col_index, new_value):
+    # On cherche le client par son Nom (colonne 1)
+    cellule = sheet.find(nom_client_principal)
+    if cellule is None:
+        raise ValueError(f"Client {nom_client_principal} introuvable.")
+    sheet.update_cell(cellule.row, col_index, new_value)
+
+def mettre_a_jour_client(sheet, nom_client_principal, adresse, ville, code_postal, telephone, email, equipement, fichiers_client):
+    """Met à jour les informations générales (tout sauf Nom, Prénom et Historique)."""
+    cellule = sheet.find(nom_client_principal)
+    if cellule is None:
+        raise ValueError(f"Client {nom_client_principal} introuvable.")
+    ligne_a_modifier = cellule.row
+
+    sheet.update_cell(ligne_a_modifier, COL_ADRESSE, adresse)
+    sheet.update_cell(ligne_a_modifier, COL_VILLE, ville)
+    sheet.update_cell(ligne_a_modifier, COL_CODE_POSTAL, code_postal)
+    sheet.update_cell(ligne_a_modifier, COL_TELEPHONE, telephone)
+    sheet.update_cell(ligne_a_modifier, COL_EMAIL, email)
+    sheet.update_cell(ligne_a_modifier, COL_EQUIPEMENT, equipement)
+    sheet.update_cell(ligne_a_modifier, COL_FICHIERS_CLIENT, fichiers_client)
+
+def nouvel_identifiant():
+    """Identifiant unique d'une intervention (12 caractères hexadécimaux), attribué une fois pour toutes."""
+    return uuid.uuid4().hex[:12]
+
+def enregistrer_historique(sheet, nom_client_principal, historique):
+    """Réécrit l'historique complet (JSON) d'un client. Les interventions sans identifiant en reçoivent un."""
+    for inter in historique:
+        inter.setdefault('id', nouvel_identifiant())
+    update_client_field(sheet, nom_client_principal, COL_HISTORIQUE, json.dumps(historique, ensure_ascii=False))
+
+def ajouter_inter_sheet(sheet, nom_client_cle, db, nouvelle_inter):
+    historique = db[nom_client_cle]['historique']
+    historique.append(nouvelle_inter)
+    enregistrer_historique(sheet, db[nom_client_cle]['nom'], historique)
+
+def supprimer_client_sheet(sheet, nom_client):
+    """Supprime la ligne du client dans Google Sheets en se basant sur le Nom."""
+    # 1. Trouver la cellule contenant le Nom du client
+    cellule = sheet.find(nom_client)
+    if cellule is None:
+        raise ValueError(f"Client {nom_client} introuvable.")
+    ligne_a_supprimer = cellule.row
+
+    # 2. Supprimer la ligne (l'index de ligne est basé sur 1)
+    if ligne_a_supprimer <= 1: # S'assurer qu'on ne supprime pas l'en-tête
+        raise ValueError("Tentative de suppression de l'en-tête.")
+    sheet.delete_rows(ligne_a_supprimer)
+
+
+# --- ARCHIVAGE DES ANCIENNES INTERVENTIONS (une feuille par année) ---
+
+def annee_intervention(inter):
+    """Retourne l'année (int) d'une intervention à partir de sa date 'AAAA-MM-JJ', ou None."""
+    try:
+        return int(str(inter.get('date', ''))[:4])
+    except ValueError:
+        return None
+
+def feuille_archive(sheet, annee, creer=False):
+    """Retourne la feuille 'Archive_AAAA' du classeur (la crée si creer=True), ou None si absente."""
+    titre = f"{ARCHIVE_PREFIXE}{annee}"
+    # Recherche par la liste des feuilles (un seul appel) plutôt que par l'exception gspread
+    for feuille in sheet.spreadsheet.worksheets():
+        if feuille.title == titre:
+            return feuille
+    if not creer:
+        return None
+    feuille = sheet.spreadsheet.add_worksheet(title=titre, rows=100, cols=len(ARCHIVE_ENTETES))
+    feuille.append_row(ARCHIVE_ENTETES)
+    return feuille
+
+def lister_annees_archivees(sheet):
+    """Liste (triée, plus récente en premier) des années disposant d'une feuille d'archive."""
+    annees = []
+    for feuille in sheet.spreadsheet.worksheets():
+        suffixe = feuille.title[len(ARCHIVE_PREFIXE):]
+        if feuille.title.startswith(ARCHIVE_PREFIXE) and suffixe.isdigit():
+            annees.append(int(suffixe))
+    return sorted(annees, reverse=True)
+
+def charger_archive_annee(sheet, annee):
+    """Charge une feuille d'archive : {nom_complet: [interventions de l'année]}."""
+    feuille = feuille_archive(sheet, annee)
+    if feuille is None:
+        return {}
+    archive = {}
+    for ligne in feuille.get_all_records():
+        nom_complet = f"{ligne.get('Nom', '')} {ligne.get('Prenom', '')}".strip()
+        archive[nom_complet] = decoder_historique(ligne.get('Historique'))
+    return archive
+
+def supprimer_archives_client(sheet, nom, prenom):
+    """
+    Supprime les lignes d'un client dans toutes les feuilles d'archive
+    (sinon un futur client du même nom hériterait de son historique archivé).
+    Retourne le nombre de lignes supprimées.
+    """
+    nom_complet = f"{nom} {prenom}".strip()
+    nb_supprimees = 0
+    for feuille in sheet.spreadsheet.worksheets():
+        if not feuille.title.startswith(ARCHIVE_PREFIXE):
+            continue
+        lignes = feuille.get_all_records()
+        num_lignes = [
+            i + 2 for i, l in enumerate(lignes) # +2 : en-tête et index basé sur 1
+            if f"{l.get('Nom', '')} {l.get('Prenom', '')}".strip() == nom_complet
+        ]
+        # Suppression du bas vers le haut pour ne pas décaler les lignes restantes
+        for num_ligne in reversed(num_lignes):
+            feuille.delete_rows(num_ligne)
+            nb_supprimees += 1
+    return nb_supprimees
+
+def attribuer_identifiants(sheet):
+    """
+    Migration : donne un identifiant ('id') aux interventions enregistrées avant son introduction,
+    dans la feuille principale et dans les feuilles d'archive (un batch_update par feuille modifiée).
+    Sans effet une fois toutes les interventions identifiées. Retourne le nombre d'identifiants attribués.
+    """
+    nb_attribues = 0
+    for feuille in sheet.spreadsheet.worksheets():
+        if feuille.title == sheet.title:
+            col_historique = COL_HISTORIQUE
+        elif feuille.title.startswith(ARCHIVE_PREFIXE):
+            col_historique = ARCHIVE_ENTETES.index("Historique") + 1
+        else:
+            continue
+        mises_a_jour = []
+        for i, ligne in enumerate(feuille.get_all_records()):
+            historique = decoder_historique(ligne.get('Historique'))
+            sans_id = [inter for inter in historique if not inter.get('id')]
+            if not sans_id:
+                continue
+            for inter in sans_id:
+                inter['id'] = nouvel_identifiant()
+            nb_attribues += len(sans_id)
+            mises_a_jour.append({
+                "range": _cellule_a1(i + 2, col_historique), # +2 : en-tête et index basé sur 1
+                "values": [[json.dumps(historique, ensure_ascii=False)]],
+            })
+        if mises_a_jour:
+            feuille.batch_update(mises_a_jour)
+    return nb_attribues
+
+def preparer_archivage(db, annee_limite):
+    """
+    Sépare les interventions antérieures à annee_limite.
+    Retourne {annee: {nom_complet: [interventions]}} (rien n'est écrit dans la feuille).
+    """
+    a_archiver = {}
+    for nom_complet, client_data in db.items():
+        for inter in client_data['historique']:
+            annee = annee_intervention(inter)
+            if annee is not None and annee < annee_limite:
+                a_archiver.setdefault(annee, {}).setdefault(nom_complet, []).append(inter)
+    return a_archiver
+
+def _cellule_a1(ligne, col):
+    """Notation A1 d'une cellule (ex. ligne 5, colonne 9 -> 'I5'), pour les mises à jour groupées."""
+    lettres = ""
+    while col:
+        col, reste = divmod(col - 1, 26)
+        lettres = chr(ord('A') + reste) + lettres
+    return f"{lettres}{ligne}"
+
+def cle_intervention(inter):
+    """
+    Clé de comparaison du CONTENU d'une intervention, identifiant exclu (détection des doublons entre
+    feuille principale et archives : une copie peut avoir reçu un autre identifiant que l'original).
+    """
+    return json.dumps({k: v for k, v in inter.items() if k != 'id'}, sort_keys=True, ensure_ascii=False)
+
+def archiver_interventions(sheet, db, annee_limite):
+    """
+    Déplace les interventions antérieures à annee_limite vers les feuilles 'Archive_AAAA'.
+
+    Les lignes sont retrouvées par Nom + Prénom dans le résultat de get_all_records() (jamais par
+    sheet.find(nom), qui confondrait deux clients de même nom), et les écritures sont groupées pour
+    rester sous le quota Sheets : par année, un append_rows pour les nouveaux clients et un batch_update
+    pour les lignes complétées ; puis un seul batch_update de la colonne Historique de la feuille principale.
+    Les lignes inchangées ne sont pas réécrites.
+
+    Les archives sont écrites AVANT d'alléger la feuille principale : en cas d'erreur,
+    une intervention peut être en double mais n'est jamais perdue (et un nouveau passage dédoublonne).
+    Retourne le nombre d'interventions retirées de la feuille principale.
+    """
+    a_archiver = preparer_archivage(db, annee_limite)
+    if not a_archiver:
+        return 0
+
+    # 1. Écriture dans les feuilles d'archive (une par année)
+    feuilles = {feuille.title: feuille for feuille in sheet.spreadsheet.worksheets()}
+    for annee, clients in a_archiver.items():
+        titre = f"{ARCHIVE_PREFIXE}{annee}"
+        if titre in feuilles:
+            feuille = feuilles[titre]
+            lignes_existantes = feuille.get_all_records()
+        else:
+            feuille = sheet.spreadsheet.add_worksheet(title=titre, rows=100, cols=len(ARCHIVE_ENTETES))
+            feuille.append_row(ARCHIVE_ENTETES)
+            lignes_existantes = []
+        index_lignes = {
+            f"{l.get('Nom', '')} {l.get('Prenom', '')}".strip(): (i + 2, l) # +2 : en-tête et index basé sur 1
+            for i, l in enumerate(lignes_existantes)
+        }
+
+        nouvelles_lignes, mises_a_jour = [], []
+        for nom_complet, inters in clients.items():
+            if nom_complet in index_lignes:
+                num_ligne, ligne = index_lignes[nom_complet]
+                deja_archive = decoder_historique(ligne.get('Historique'))
+                deja_vus = {cle_intervention(h) for h in deja_archive}
+                a_ajouter = [h for h in inters if cle_intervention(h) not in deja_vus]
+                if a_ajouter: # Ligne inchangée : rien à réécrire
+                    mises_a_jour.append({
+                        "range": _cellule_a1(num_ligne, ARCHIVE_ENTETES.index("Historique") + 1),
+                        "values": [[json.dumps(deja_archive + a_ajouter, ensure_ascii=False)]],
+                    })
+            else:
+                client_data = db[nom_complet]
+                nouvelles_lignes.append([client_data['nom'], client_data['prenom'], json.dumps(inters, ensure_ascii=False)])
+
+        if nouvelles_lignes:
+            feuille.append_rows(nouvelles_lignes)
+        if mises_a_jour:
+            feuille.batch_update(mises_a_jour)
+
+    # 2. Allègement de la feuille principale, à partir d'une lecture fraîche :
+    #    on ne retire que les interventions archivées, une intervention ajoutée entre-temps est conservée.
+    archivees = {}
+    for clients in a_archiver.values():
+        for nom_complet, inters in clients.items():
+            archivees.setdefault(nom_complet, set()).update(cle_intervention(h) for h in inters)
+
+    mises_a_jour, nb_retirees = [], 0
+    for i, ligne in enumerate(sheet.get_all_records()):
+        nom_complet = f"{ligne.get('Nom', '')} {ligne.get('Prenom', '')}".strip()
+        if nom_complet not in archivees:
+            continue
+        historique = decoder_historique(ligne.get('Historique'))
+        historique_conserve = [h for h in historique if cle_intervention(h) not in archivees[nom_complet]]
+        if len(historique_conserve) == len(historique):
+            continue
+        nb_retirees += len(historique) - len(historique_conserve)
+        mises_a_jour.append({
+            "range": _cellule_a1(i + 2, COL_HISTORIQUE),
+            "values": [[json.dumps(historique_conserve, ensure_ascii=False)]],
+        })
+        if nom_complet in db:
+            db[nom_complet]['historique'] = historique_conserve
+
+    if mises_a_jour:
+        sheet.batch_update(mises_a_jour)
+
+    return nb_retirees
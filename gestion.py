@@ -1,11 +1,25 @@
 import streamlit as st
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 from datetime import datetime
-import json
 import re # Importation du module re pour les expressions régulières/nettoyage
 import time
 
+# Toute la logique de données (lecture, écriture, archivage) est dans donnees.py, sans dépendance à Streamlit.
+# Ce fichier ne contient que l'interface.
+import donnees
+from donnees import (
+    ARCHIVE_PREFIXE, ARCHIVE_ANNEES_CONSERVEES,
+    charger_donnees, rechercher_clients, ajouter_nouveau_client_sheet,
+    mettre_a_jour_client, enregistrer_historique, ajouter_inter_sheet, supprimer_client_sheet,
+    lister_annees_archivees, charger_archive_annee, preparer_archivage, archiver_interventions,
+    supprimer_archives_client
+)
+# Génération en lot des rapports / factures PDF
+import rapports
+import os
+import tempfile
+# Mesure des durées (connexion, chargement, recherche, rendu) et des appels à l'API Google Sheets
+from instrumentation import Mesures, FeuilleInstrumentee, configurer_journal
+
 # --- CONFIGURATION DE LA PAGE ---
 st.set_page_config(page_title="Gestion Chauffagiste", page_icon="🔥", layout="wide")
 
@@ -21,22 +35,12 @@ IMAGE_URL_2 = "https://raw.githubusercontent.com/Treyore/app-seb/92e1af7d7313f8d
 # --- CONNEXION GOOGLE SHEETS (Compatible PC et Cloud) ---
 @st.cache_resource(ttl=3600) # Mise en cache de la CONNEXION pour 1h
 def connexion_google_sheet():
-    scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-    
     try:
         # CAS 1 : On est sur le serveur (Streamlit Cloud)
         if "gcp_service_account" in st.secrets:
-            creds_dict = dict(st.secrets["gcp_service_account"])
-            creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
+            return donnees.connexion_google_sheet(dict(st.secrets["gcp_service_account"]))
         # CAS 2 : On est sur le PC en local (avec le fichier secrets.json)
-        else:
-            # Assurez-vous d'avoir votre fichier 'secrets.json' dans le répertoire
-            creds = ServiceAccountCredentials.from_json_keyfile_name("secrets.json", scope)
-            
-        client = gspread.authorize(creds)
-        # Ouvre la feuille (assurez-vous que le nom correspond à votre feuille)
-        sheet = client.open("Base Clients Chauffage").sheet1 
-        return sheet
+        return donnees.connexion_google_sheet()
     except Exception as e:
         st.error(f"Erreur de connexion : {e}")
         st.stop()
@@ -56,140 +60,102 @@ def handle_upload(uploaded_file):
         return placeholder_link
     return None
 
-# --- FONCTIONS EXISTANTES ---
-
-# Charger les données sans cache Streamlit pour éviter les problèmes d'hachage avec gspread
-def charger_donnees(sheet):
-    # Récupère toutes les lignes du tableau
-    lignes = sheet.get_all_records()
-    db = {}
-    for ligne in lignes:
-        nom_complet = f"{ligne.get('Nom', '')} {ligne.get('Prenom', '')}".strip()
-        if nom_complet: # S'assurer que le client a un nom
-            try:
-                # L'historique est stocké sous forme de texte codé (JSON), on le décode
-                historique = json.loads(ligne.get('Historique', '')) if ligne.get('Historique') else []
-            except:
-                historique = []
-            
-            # Stockage de TOUS les champs (AJOUT du champ fichiers_client)
-            client_data = {
-                "nom": ligne.get('Nom', ''),
-                "prenom": ligne.get('Prenom', ''),
-                "adresse": ligne.get('Adresse', ''),
-                "ville": ligne.get('Ville', ''),
-                "code_postal": ligne.get('Code_Postal', ''),
-                "telephone": ligne.get('Telephone', ''),
-                "email": ligne.get('Email', ''),
-                "equipement": ligne.get('Equipement', ''),
-                "fichiers_client": ligne.get('Fichiers_Client', ''), # NOUVEAU : Doit exister dans l'en-tête de votre Google Sheet
-                "historique": historique
-            }
-
-            # Créer un index de recherche pour tous les champs pertinents
-            index_fields = [
-                client_data["nom"], client_data["prenom"], client_data["adresse"],
-                client_data["ville"], client_data["code_postal"], client_data["telephone"],
-                client_data["email"], client_data["equipement"], client_data["fichiers_client"]
-            ]
-            
-            # Concaténation des champs, conversion en minuscules et nettoyage
-            search_index = " ".join(str(f) for f in index_fields if f).lower()
-            # Nettoyer l'index (enlever les caractères spéciaux qui ne facilitent pas la recherche)
-            search_index = re.sub(r'[^a-z0-9\s]', '', search_index)
-            client_data["recherche_index"] = search_index
-            
-            db[nom_complet] = client_data
-            
-            # Stocker aussi le nom complet (clé d'accès au dictionnaire) pour l'utiliser dans les fonctions de mise à jour
-            client_data["nom_complet"] = nom_complet 
-            
-    return db
-
-def ajouter_nouveau_client_sheet(sheet, nom, prenom, adresse, ville, code_postal, tel, email, equipement, fichiers_client):
-    # L'ordre des colonnes est : Nom, Prenom, Adresse, Ville, CP, Tel, Email, Equipement, Historique (9), Fichiers_Client (10)
-    nouvelle_ligne = [
-        nom, prenom, adresse, ville, code_postal, tel, email, equipement, 
-        "[]", 
-        fichiers_client 
-    ]
-    sheet.append_row(nouvelle_ligne)
-
-    # Message de succès (CONSERVÉ)
-    st.session_state["succes_ajout"] = f"✅ Client {nom} {prenom} ajouté avec succès !"
-
-    # Le nettoyage des champs est géré par clear_on_submit=True.
-
-    st.cache_resource.clear()
-    st.rerun()
-
-# Fonction générique pour mettre à jour un champ unique dans la ligne d'un client
-def update_client_field(sheet, nom_client_principal, col_index, new_value):
-    try:
-        # On cherche le client par son Nom (colonne 1)
-        cellule = sheet.find(nom_client_principal) 
-        sheet.update_cell(cellule.row, col_index, new_value)
-        return True
-    except Exception as e:
-        st.error(f"Erreur lors de la mise à jour du champ (col {col_index}) : {e}")
-        return False
-        
-def ajouter_inter_sheet(sheet, nom_client_cle, db, nouvelle_inter):
-    historique = db[nom_client_cle]['historique']
-    historique.append(nouvelle_inter)
-    historique_txt = json.dumps(historique, ensure_ascii=False)
-    
-    nom = db[nom_client_cle]['nom']
-    
+# Nettoyage des champs du formulaire "Nouvelle Intervention" après enregistrement
+def reinitialiser_formulaire_inter():
+    # NETTOYAGE AGRESSIF (SUPPRESSION DES CLÉS)
+    # Cela force Streamlit à réinitialiser les widgets au rerun.
+    for cle in ["inter_desc", "inter_prix", "inter_type_specifique", "text_inter_add", "inter_techs", "file_inter_add",
+                "inter_date"]: # On supprime aussi la date pour la réinitialiser au datetime.now()
+        if cle in st.session_state: del st.session_state[cle]
+
+# Affichage d'une intervention (utilisé pour l'historique courant et les archives)
+def afficher_intervention(h):
+    techniciens_str = ", ".join(h.get('techniciens', ['N/A']))
+    type_str = h.get('type', 'N/A')
+
+    st.info(
+        f"**{type_str}** par **{techniciens_str}** le 📅 **{h['date']}** : "
+        f"{h['desc']} ({h['prix']}€)"
+    )
+
+    # AFFICHAGE des FICHIERS INTERVENTION
+    fichiers_inter_str = h.get('fichiers_inter', '')
+    if fichiers_inter_str:
+         st.markdown("**🔗 Pièces jointes :**")
+         # Afficher les liens sous forme de liste cliquable
+         links = re.split(r'[,\n]', fichiers_inter_str)
+         for link in [l.strip() for l in links if l.strip()]:
+            if link.startswith('http'):
+                st.markdown(f"  - [Ouvrir le fichier]({link})")
+            else:
+                st.markdown(f"  - {link} (Lien invalide ou incomplet)")
+
+# Chargement à la demande d'une année d'archive, mémorisé dans la session pour éviter de relire la feuille à chaque rerun
+def archive_en_session(sheet, annee):
+    if "archives" not in st.session_state:
+        st.session_state["archives"] = {}
+    if annee not in st.session_state["archives"]:
+        st.session_state["archives"][annee] = charger_archive_annee(sheet, annee)
+    return st.session_state["archives"][annee]
+
+# Liste des années archivées, mémorisée dans la session (évite un appel worksheets() à chaque rerun)
+def annees_archivees_en_session(sheet):
+    if "annees_archivees" not in st.session_state:
+        st.session_state["annees_archivees"] = lister_annees_archivees(sheet)
+    return st.session_state["annees_archivees"]
+
+# Les archives mémorisées en session ne sont plus à jour (après archivage ou suppression d'un client)
+def oublier_archives_en_session():
+    for cle in ["archives", "annees_archivees"]:
+        if cle in st.session_state: del st.session_state[cle]
+
+# Panneau de débogage (barre latérale) : durées du rerun, appels API et quota de la session
+def afficher_panneau_perf(mesures):
+    resume = mesures.resume()
+    with st.sidebar.expander("Performances (session)", expanded=True):
+        st.markdown(f"**Dernier rerun** ({resume['appels_dernier_rerun']} appel(s) API)")
+        for nom, duree_ms in resume['dernier_rerun_ms'].items():
+            st.write(f"- {nom} : {duree_ms} ms")
+
+        st.markdown(f"**Appels API** ({mesures.total_appels} sur {resume['reruns']} rerun(s))")
+        for methode, stats in resume['appels_api'].items():
+            erreurs = f", {stats['erreurs_quota']} erreur(s) quota" if stats['erreurs_quota'] else ""
+            st.write(f"- {methode} : {stats['n']} appel(s), {stats['total_s'] * 1000:.0f} ms{erreurs}")
+
+        quota = resume['utilisation_quota']
+        st.write(f"Quota / min : lecture {quota['lecture']:.0%}, écriture {quota['ecriture']:.0%}")
+
+        st.download_button("Exporter (JSON)", mesures.vers_json(), file_name="sebapp_mesures.json", mime="application/json")
+        st.download_button("Exporter (Prometheus)", mesures.vers_prometheus(), file_name="sebapp_metrics.prom", mime="text/plain")
+
+# st.rerun() / st.stop() interrompent le script par une exception : on enregistre d'abord les mesures du rerun
+# en cours, sinon les reruns qui écrivent dans la feuille (tous terminés par st.rerun) ne seraient jamais journalisés.
+def relancer():
     try:
-        cellule = sheet.find(nom)
-        # Historique est en COLONNE 9 (I)
-        sheet.update_cell(cellule.row, 9, historique_txt) 
-        
-        # Message de succès
-        st.session_state['succes_ajout'] = "✅ Intervention ajoutée avec succès !"
-        
-        # MODIFICATION : NETTOYAGE AGRESSIF (SUPPRESSION DES CLÉS)
-        # Cela force Streamlit à réinitialiser les widgets au rerun.
-        if "inter_desc" in st.session_state: del st.session_state["inter_desc"]
-        if "inter_prix" in st.session_state: del st.session_state["inter_prix"]
-        if "inter_type_specifique" in st.session_state: del st.session_state["inter_type_specifique"]
-        if "text_inter_add" in st.session_state: del st.session_state["text_inter_add"]
-        if "inter_techs" in st.session_state: del st.session_state["inter_techs"]
-        if "file_inter_add" in st.session_state: del st.session_state["file_inter_add"]
-        # On supprime aussi la date pour la réinitialiser au datetime.now()
-        if "inter_date" in st.session_state: del st.session_state["inter_date"]
+        mesures.terminer_rerun()
+    finally:
+        st.rerun()
 
-    except Exception as e:
-        # Capture de l'erreur pour ne pas bloquer le rerun
-        st.error(f"Erreur lors de la mise à jour de la feuille : {e}")
-        
-    st.cache_resource.clear()
-    st.rerun()
-# FONCTION POUR SUPPRIMER UN CLIENT
-def supprimer_client_sheet(sheet, nom_client):
-    """Supprime la ligne du client dans Google Sheets en se basant sur le Nom."""
+def arreter():
     try:
-        # 1. Trouver la cellule contenant le Nom du client
-        cellule = sheet.find(nom_client)
-        ligne_a_supprimer = cellule.row
-        
-        # 2. Supprimer la ligne (l'index de ligne est basé sur 1)
-        if ligne_a_supprimer > 1: # S'assurer qu'on ne supprime pas l'en-tête
-            sheet.delete_rows(ligne_a_supprimer)
-            return True
-        else:
-            st.error("Tentative de suppression de l'en-tête ou ligne non trouvée.")
-            return False
-            
-    except Exception as e:
-        st.error(f"Erreur lors de la suppression du client : Impossible de trouver la ligne du client. {e}")
-        return False
+        mesures.terminer_rerun()
+    finally:
+        st.stop()
 
 # --- INTERFACE GRAPHIQUE ---
 
+# 0. Mesures de la session (conservées d'un rerun à l'autre)
+if "mesures" not in st.session_state:
+    st.session_state["mesures"] = Mesures()
+mesures = st.session_state["mesures"]
+# Une ligne JSON par rerun sur le logger 'sebapp.perf' (SEBAPP_PERF_NIVEAU=WARNING pour le couper)
+configurer_journal()
+mesures.nouveau_rerun()
+
 # 1. Connexion (doit être en dehors de la boucle du menu)
-sheet = connexion_google_sheet()
+# Chaque appel à la feuille passe par l'instrumentation (la connexion en cache reste partagée)
+with mesures.phase("connexion"):
+    sheet = FeuilleInstrumentee(connexion_google_sheet(), mesures)
 
 # ------------------------------------------------------------------
 # --- DÉMARRAGE DIRECT DE L'APPLICATION PRINCIPALE ---
@@ -203,14 +169,20 @@ menu = st.sidebar.radio(
         "➕ Nouveau Client", 
         "🛠️ Nouvelle Intervention", 
         "✍️ Mettre à jour (Modifier)",
-        "🗑️ Supprimer Client/Intervention"
+        "🗑️ Supprimer Client/Intervention",
+        "🗄️ Archivage",
+        "🧾 Rapports & Factures"
     ),
     # Index par défaut est 0, ce qui correspond à "🔍 Rechercher"
     index=0 
 )
 
 # 3. Chargement des données (Doit toujours charger les données)
-db = charger_donnees(sheet)
+with mesures.phase("charger_donnees"):
+    db = charger_donnees(sheet)
+
+# Le rendu va jusqu'à la fin du script ou jusqu'à relancer() / arreter() ; s'il est interrompu autrement, il est abandonné
+mesures.debut_phase("rendu")
 
 st.title(APP_TITLE)
 st.markdown("---")
@@ -233,20 +205,9 @@ if menu == "🔍 Rechercher":
     # -----------------------------------------------------
     # LOGIQUE DE FILTRAGE
     # -----------------------------------------------------
-    resultats = []
-    if recherche:
-        search_term = recherche.lower()
-        search_term = re.sub(r'[^a-z0-9\s]', '', search_term).strip()
-        
-        if search_term:
-            # On cherche si le terme de recherche se trouve n'importe où dans l'index_recherche
-            for nom_complet, client_data in db.items():
-                if search_term in client_data['recherche_index']:
-                    resultats.append(nom_complet)
-        
-    else:
-        # Si le champ de recherche est vide, on affiche tous les clients (par ordre alphabétique)
-        resultats = sorted(db.keys())
+    # Si le champ de recherche est vide, on affiche tous les clients (par ordre alphabétique)
+    with mesures.phase("recherche"):
+        resultats = rechercher_clients(db, recherche)
 
     if resultats:
         st.subheader(f"Résultats ({len(resultats)})")
@@ -287,28 +248,24 @@ if menu == "🔍 Rechercher":
             if infos['historique']:
                 # Afficher la dernière intervention en haut
                 for h in sorted(infos['historique'], key=lambda x: x['date'], reverse=True): # Trie par date
-                    techniciens_str = ", ".join(h.get('techniciens', ['N/A']))
-                    type_str = h.get('type', 'N/A')
-                    
-                    st.info(
-                        f"**{type_str}** par **{techniciens_str}** le 📅 **{h['date']}** : "
-                        f"{h['desc']} ({h['prix']}€)"
-                    )
-                    
-                    # AFFICHAGE des FICHIERS INTERVENTION
-                    fichiers_inter_str = h.get('fichiers_inter', '')
-                    if fichiers_inter_str:
-                         st.markdown("**🔗 Pièces jointes :**")
-                         # Afficher les liens sous forme de liste cliquable
-                         links = re.split(r'[,\n]', fichiers_inter_str)
-                         for link in [l.strip() for l in links if l.strip()]:
-                            if link.startswith('http'):
-                                st.markdown(f"  - [Ouvrir le fichier]({link})")
-                            else:
-                                st.markdown(f"  - {link} (Lien invalide ou incomplet)")
+                    afficher_intervention(h)
 
             else:
                 st.write("Aucune intervention enregistrée pour ce client.")
+
+            # HISTORIQUE ARCHIVÉ : chargé uniquement quand l'utilisateur le demande
+            if st.checkbox("🗄️ Afficher les interventions archivées", key=f"voir_archives_{selection}"):
+                annees_archivees = annees_archivees_en_session(sheet)
+                if not annees_archivees:
+                    st.write("Aucune archive disponible.")
+                for annee in annees_archivees:
+                    if st.checkbox(f"Année {annee}", key=f"archive_{annee}_{selection}"):
+                        inters_archivees = archive_en_session(sheet, annee).get(selection, [])
+                        if inters_archivees:
+                            for h in sorted(inters_archivees, key=lambda x: x['date'], reverse=True):
+                                afficher_intervention(h)
+                        else:
+                            st.write(f"Aucune intervention archivée en {annee} pour ce client.")
     else:
         st.warning("Aucun client trouvé correspondant à la recherche.")
 
@@ -357,7 +314,7 @@ elif menu == "➕ Nouveau Client":
                 new_link = handle_upload(uploaded_file_client)
                 if new_link:
                     st.session_state.text_client_add += f"\n{new_link}"
-                    st.rerun() 
+                    relancer() 
             
         valider = st.form_submit_button("Enregistrer le client")
         
@@ -373,7 +330,14 @@ elif menu == "➕ Nouveau Client":
                 if nom_complet in db:
                     st.warning(f"Le client {nom_complet} existe déjà dans la base.")
                 else:
-                    ajouter_nouveau_client_sheet(sheet, nom, prenom, adresse, ville, code_postal, telephone, email, equipement, final_fichiers_client)
+                    try:
+                        ajouter_nouveau_client_sheet(sheet, nom, prenom, adresse, ville, code_postal, telephone, email, equipement, final_fichiers_client)
+                        # Message de succès (le nettoyage des champs est géré par clear_on_submit=True)
+                        st.session_state["succes_ajout"] = f"✅ Client {nom} {prenom} ajouté avec succès !"
+                        st.cache_resource.clear()
+                        relancer()
+                    except Exception as e:
+                        st.error(f"Erreur lors de l'ajout du client : {e}")
             else:
                 # Message d'erreur si Nom ou Ville manque
                 st.error("Le Nom et la Ville sont obligatoires.")
@@ -432,7 +396,7 @@ elif menu == "🛠️ Nouvelle Intervention":
                 new_link = handle_upload(uploaded_file_inter)
                 if new_link:
                     st.session_state.text_inter_add += f"\n{new_link}"
-                    st.rerun() 
+                    relancer() 
 
         
         if st.button("Valider l'intervention"):
@@ -450,7 +414,15 @@ elif menu == "🛠️ Nouvelle Intervention":
                     "prix": prix,
                     "fichiers_inter": final_fichiers_inter 
                 }
-                ajouter_inter_sheet(sheet, choix, db, inter)
+                try:
+                    ajouter_inter_sheet(sheet, choix, db, inter)
+                    st.session_state['succes_ajout'] = "✅ Intervention ajoutée avec succès !"
+                    reinitialiser_formulaire_inter()
+                except Exception as e:
+                    # Capture de l'erreur pour ne pas bloquer le rerun
+                    st.error(f"Erreur lors de la mise à jour de la feuille : {e}")
+                st.cache_resource.clear()
+                relancer()
     else:
         st.info("La base est vide.")
 # ------------------------------------------------------------------
@@ -515,7 +487,7 @@ elif menu == "✍️ Mettre à jour (Modifier)":
                         new_link = handle_upload(uploaded_file_client_update)
                         if new_link:
                             st.session_state[key_client_files] += f"\n{new_link}"
-                            st.rerun() 
+                            relancer() 
                 
                 update_valider = st.form_submit_button("Sauvegarder les modifications Client")
                 
@@ -523,20 +495,14 @@ elif menu == "✍️ Mettre à jour (Modifier)":
                     final_fichiers_client = st.session_state.get(key_client_files, '')
                     
                     try:
-                        cellule = sheet.find(infos_actuelles['nom'])
-                        ligne_a_modifier = cellule.row
-                        
-                        sheet.update_cell(ligne_a_modifier, 3, nouvelle_adresse)  
-                        sheet.update_cell(ligne_a_modifier, 4, nouvelle_ville)    
-                        sheet.update_cell(ligne_a_modifier, 5, nouveau_code_postal) 
-                        sheet.update_cell(ligne_a_modifier, 6, nouveau_telephone)  
-                        sheet.update_cell(ligne_a_modifier, 7, nouvel_email)     
-                        sheet.update_cell(ligne_a_modifier, 8, nouvel_equipement)
-                        sheet.update_cell(ligne_a_modifier, 10, final_fichiers_client) 
+                        mettre_a_jour_client(
+                            sheet, infos_actuelles['nom'], nouvelle_adresse, nouvelle_ville, nouveau_code_postal,
+                            nouveau_telephone, nouvel_email, nouvel_equipement, final_fichiers_client
+                        )
                         
                         st.success(f"Informations générales mises à jour !")
                         st.cache_resource.clear()
-                        st.rerun()
+                        relancer()
                         
                     except Exception as e:
                         st.error(f"Erreur lors de la mise à jour : {e}")
@@ -644,7 +610,7 @@ elif menu == "✍️ Mettre à jour (Modifier)":
                             new_link = handle_upload(uploaded_file_inter_update)
                             if new_link:
                                 st.session_state[key_inter_files] += f"\n{new_link}"
-                                st.rerun() 
+                                relancer() 
 
                     sauvegarder_inter = st.form_submit_button("Sauvegarder l'intervention modifiée")
                     
@@ -653,7 +619,7 @@ elif menu == "✍️ Mettre à jour (Modifier)":
                         if nouveau_type == "Autre":
                             if not type_specifique_mod.strip():
                                 st.warning("Veuillez spécifier le type d'intervention 'Autre'.")
-                                st.stop()
+                                arreter()
                             type_a_enregistrer = type_specifique_mod.strip()
 
                         final_fichiers_inter = st.session_state.get(key_inter_files, '')
@@ -666,13 +632,17 @@ elif menu == "✍️ Mettre à jour (Modifier)":
                             "prix": nouveau_prix,
                             "fichiers_inter": final_fichiers_inter
                         }
+                        # L'identifiant (numéro de facture) ne change pas quand on modifie l'intervention
+                        if inter_a_modifier.get('id'):
+                            historique[inter_index]['id'] = inter_a_modifier['id']
                         
-                        historique_txt = json.dumps(historique, ensure_ascii=False)
-                        
-                        if update_client_field(sheet, infos_actuelles['nom'], 9, historique_txt):
+                        try:
+                            enregistrer_historique(sheet, infos_actuelles['nom'], historique)
                             st.success(f"Intervention du {nouvelle_date} mise à jour avec succès.")
                             st.cache_resource.clear()
-                            st.rerun()
+                            relancer()
+                        except Exception as e:
+                            st.error(f"Erreur lors de la mise à jour de l'historique : {e}")
 
 # ------------------------------------------------------------------
 # --- BLOC : SUPPRESSION ---
@@ -710,17 +680,23 @@ elif menu == "🗑️ Supprimer Client/Intervention":
                 with col_del_ok:
                     if st.button("CONFIRMER LA SUPPRESSION DÉFINITIVE DU CLIENT", type="primary"):
                         # Utiliser le Nom du client comme clé de recherche de ligne pour la suppression
-                        if supprimer_client_sheet(sheet, infos_actuelles_del['nom']):
+                        try:
+                            supprimer_client_sheet(sheet, infos_actuelles_del['nom'])
+                            # Son historique archivé est supprimé aussi
+                            supprimer_archives_client(sheet, infos_actuelles_del['nom'], infos_actuelles_del['prenom'])
+                            oublier_archives_en_session()
                             st.success(f"Le client {client_selectionne_del} a été SUPPRIMÉ avec succès.")
                             # Réinitialiser l'état de confirmation
                             st.session_state.suppression_confirmee_client = False
                             st.cache_resource.clear()
-                            st.rerun()
+                            relancer()
+                        except Exception as e:
+                            st.error(f"Erreur lors de la suppression du client : {e}")
                 
                 with col_del_cancel:
                     if st.button("Annuler la suppression du client"):
                         st.session_state.suppression_confirmee_client = False
-                        st.rerun()
+                        relancer()
                         
         # --- Suppression Intervention ---
         st.markdown("---")
@@ -755,27 +731,107 @@ elif menu == "🗑️ Supprimer Client/Intervention":
                     # Retirer l'intervention de la liste
                     del historique_del[inter_index_del]
                     
-                    # Convertir l'historique mis à jour en JSON
-                    historique_txt_del = json.dumps(historique_del, ensure_ascii=False)
-                    
-                    # Enregistrer le nouvel historique dans Google Sheets (Colonne 9 / I)
-                    if update_client_field(sheet, infos_actuelles_inter_del['nom'], 9, historique_txt_del):
+                    # Enregistrer le nouvel historique (JSON) dans Google Sheets (Colonne 9 / I)
+                    try:
+                        enregistrer_historique(sheet, infos_actuelles_inter_del['nom'], historique_del)
                         st.success(f"L'intervention '{inter_a_supprimer_titre}' a été supprimée avec succès de l'historique de {client_selectionne_inter_del}.")
                         st.cache_resource.clear()
-                        st.rerun()
-
-
-
-
-
-
-
-
-
-
-
-
+                        relancer()
+                    except Exception as e:
+                        st.error(f"Erreur lors de la mise à jour de l'historique : {e}")
 
+# ------------------------------------------------------------------
+# --- BLOC : ARCHIVAGE ---
+# ------------------------------------------------------------------
+elif menu == "🗄️ Archivage":
+    st.header("🗄️ Archivage des anciennes interventions")
+    st.write(
+        "Les interventions antérieures à l'année choisie sont déplacées dans une feuille par année "
+        f"(« {ARCHIVE_PREFIXE}AAAA »). Elles restent consultables depuis la page de recherche."
+    )
+
+    annee_limite = st.number_input(
+        "Archiver les interventions antérieures à l'année",
+        min_value=1900,
+        max_value=datetime.now().year,
+        value=datetime.now().year - ARCHIVE_ANNEES_CONSERVEES + 1,
+        step=1,
+        key="archive_annee_limite"
+    )
+
+    a_archiver = preparer_archivage(db, int(annee_limite))
+    if not a_archiver:
+        st.info("Aucune intervention à archiver pour cette année limite.")
+    else:
+        for annee in sorted(a_archiver):
+            nb_inters = sum(len(inters) for inters in a_archiver[annee].values())
+            st.write(f"- **{annee}** : {nb_inters} intervention(s) sur {len(a_archiver[annee])} client(s)")
 
+        if st.button("Lancer l'archivage", type="primary"):
+            try:
+                nb_archivees = archiver_interventions(sheet, db, int(annee_limite))
+                st.session_state['succes_ajout'] = f"✅ {nb_archivees} intervention(s) archivée(s) avec succès !"
+                oublier_archives_en_session()
+                st.cache_resource.clear()
+                relancer()
+            except Exception as e:
+                st.error(f"Erreur lors de l'archivage : {e}")
 
+# ------------------------------------------------------------------
+# --- BLOC : RAPPORTS & FACTURES (PDF en lot) ---
+# ------------------------------------------------------------------
+elif menu == "🧾 Rapports & Factures":
+    st.header("🧾 Rapports d'intervention et factures")
+
+    col_debut, col_fin = st.columns(2)
+    aujourdhui = datetime.now().date()
+    with col_debut:
+        date_debut = st.date_input("Du", aujourdhui.replace(day=1), key="rapport_debut")
+    with col_fin:
+        date_fin = st.date_input("Au", aujourdhui, key="rapport_fin")
+    nature = st.radio("Document", list(rapports.NATURES), format_func=rapports.NATURES.get, horizontal=True, key="rapport_nature")
+
+    # Les années déjà archivées de la période sont lues à la demande (liste et contenu mémorisés en session)
+    try:
+        archives = {annee: archive_en_session(sheet, annee)
+                    for annee in rapports.annees_concernees(annees_archivees_en_session(sheet), date_debut, date_fin)}
+        documents = rapports.selectionner_interventions(db, date_debut, date_fin, archives)
+        st.write(f"{len(documents)} intervention(s) sur la période.")
+    except Exception as e:
+        st.error(f"Erreur lors de la sélection des interventions : {e}")
+        documents = []
+
+    if documents and st.button("Générer les PDF", type="primary"):
+        barre = st.progress(0.0, text="Génération en cours...")
+        # Un fichier temporaire propre à cette génération (deux sessions ne s'écrasent pas), supprimé une fois lu
+        descripteur, chemin_zip = tempfile.mkstemp(suffix=".zip")
+        os.close(descripteur)
+        try:
+            # Les interventions enregistrées avant les identifiants en reçoivent un (leur numéro de document)
+            if donnees.attribuer_identifiants(sheet):
+                db = charger_donnees(sheet)
+            # Liste des années et contenu des archives relus : un archivage fait depuis une autre session
+            # ne doit pas manquer dans les documents générés
+            oublier_archives_en_session()
+            archives = {annee: archive_en_session(sheet, annee)
+                        for annee in rapports.annees_concernees(annees_archivees_en_session(sheet), date_debut, date_fin)}
+            documents = rapports.selectionner_interventions(db, date_debut, date_fin, archives)
+            nb_documents = rapports.generer_lot(
+                documents, chemin_zip, nature,
+                progression=lambda faits, total: barre.progress(faits / total, text=f"{faits}/{total} document(s)")
+            )
+            with open(chemin_zip, "rb") as f:
+                contenu_zip = f.read()
+            st.success(f"{nb_documents} document(s) générés.")
+            st.download_button("Télécharger le zip", contenu_zip, file_name=f"{nature}s_{date_debut}_{date_fin}.zip", mime="application/zip")
+        except Exception as e:
+            st.error(f"Erreur lors de la génération des PDF : {e}")
+        finally:
+            os.remove(chemin_zip)
 
+# ------------------------------------------------------------------
+# --- FIN DU RERUN : MESURES ---
+# ------------------------------------------------------------------
+mesures.terminer_rerun()
+if st.sidebar.checkbox("🐞 Panneau de performance", key="afficher_perf"):
+    afficher_panneau_perf(mesures)
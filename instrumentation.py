@@ -0,0 +1,256 @@
+"""
+Instrumentation des chemins critiques : durée des phases d'un rerun et comptage des appels à l'API Google Sheets.
+
+Comme donnees.py, ce module ne dépend pas de Streamlit : il sert à la page (panneau de débogage
+dans la barre latérale), aux scripts batch et aux outils de mesure (dossier benchmarks).
+
+    mesures = Mesures()
+    sheet = FeuilleInstrumentee(connexion_google_sheet(), mesures)   # chaque appel API est chronométré
+    with mesures.phase("charger_donnees"):
+        db = charger_donnees(sheet)
+    print(mesures.vers_prometheus())
+
+Journal structuré : Mesures.terminer_rerun() écrit une ligne JSON par rerun sur le logger 'sebapp.perf'.
+Ce logger n'affiche rien tant qu'il n'est pas configuré : appeler configurer_journal() (c'est ce que fait
+gestion.py ; niveau réglable par la variable d'environnement SEBAPP_PERF_NIVEAU, ex. "WARNING" pour le couper).
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger("sebapp.perf")
+
+
+def configurer_journal(niveau=None):
+    """
+    Active la sortie du logger 'sebapp.perf' (une ligne JSON par rerun, sur la sortie d'erreur).
+    Sans argument, le niveau vient de SEBAPP_PERF_NIVEAU (INFO par défaut). Peut être appelée à chaque rerun.
+    """
+    logger.setLevel(niveau or os.environ.get("SEBAPP_PERF_NIVEAU", "INFO"))
+    if not logger.handlers:
+        gestionnaire = logging.StreamHandler()
+        gestionnaire.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(gestionnaire)
+        logger.propagate = False
+
+# Méthodes gspread qui déclenchent une requête vers l'API, classées selon le quota Sheets concerné
+METHODES_LECTURE = {"get_all_records", "get_all_values", "find", "findall", "worksheets", "worksheet"}
+METHODES_ECRITURE = {"update_cell", "update", "batch_update", "append_row", "append_rows", "delete_rows", "add_worksheet"}
+METHODES_API = METHODES_LECTURE | METHODES_ECRITURE
+# Méthodes qui retournent une (ou des) feuille(s) : le résultat est lui aussi instrumenté
+METHODES_FEUILLES = {"worksheets", "worksheet", "add_worksheet"}
+
+# Quota Google Sheets par défaut, par utilisateur et par minute (lecture et écriture séparément)
+QUOTA_LECTURE_PAR_MINUTE = 60
+QUOTA_ECRITURE_PAR_MINUTE = 60
+
+
+def est_erreur_quota(erreur):
+    """
+    Vrai pour une erreur 429 (quota dépassé), qu'elle vienne de gspread (APIError : code HTTP de
+    erreur.response) ou de la fausse feuille des benchmarks (attribut code). Le message n'est pas
+    examiné : un nom de client contenant "429" ou "quota" ne doit pas être compté comme tel.
+    """
+    if getattr(erreur, "code", None) == 429:
+        return True
+    return getattr(getattr(erreur, "response", None), "status_code", None) == 429
+
+
+class Mesures:
+    """
+    Collecteur de mesures pour UNE session (un utilisateur de l'application).
+    Les phases sont cumulées sur toute la session, et la durée de chaque phase pendant
+    le dernier rerun est conservée à part pour le panneau de débogage.
+    """
+
+    def __init__(self, session=None):
+        self.session = session or uuid.uuid4().hex[:8]
+        self.reruns = 0
+        self.phases = {}           # nom -> {"n", "total_s", "max_s"}
+        self.appels = {}           # methode -> {"n", "total_s", "erreurs_quota"}
+        self.dernier_rerun = {}    # nom de phase -> durée (s) pendant le rerun en cours / dernier rerun
+        self.appels_rerun = 0      # appels API pendant le rerun en cours / dernier rerun
+        self._phases_ouvertes = {}
+        self._rerun_termine = True
+        self._horodatages = {"lecture": deque(), "ecriture": deque()}
+        self._verrou = threading.Lock()
+
+    # --- PHASES ---
+
+    def nouveau_rerun(self):
+        """
+        À appeler au début de chaque exécution du script.
+        Si le rerun précédent a été interrompu (st.stop, interruption par Streamlit, exception) sans
+        terminer_rerun(), ses phases encore ouvertes sont ABANDONNÉES (leur durée inclurait le temps
+        d'inactivité de l'utilisateur) et il est journalisé comme interrompu.
+        """
+        self._phases_ouvertes.clear()
+        if not self._rerun_termine:
+            self.journaliser(interrompu=True)
+        with self._verrou:
+            self.reruns += 1
+            self.dernier_rerun = {}
+            self.appels_rerun = 0
+            self._rerun_termine = False
+
+    def terminer_rerun(self):
+        """À appeler en fin de rerun (y compris juste avant st.rerun) : ferme les phases ouvertes et journalise."""
+        if self._rerun_termine:
+            return
+        for nom in list(self._phases_ouvertes):
+            self.fin_phase(nom)
+        self._rerun_termine = True
+        self.journaliser()
+
+    def debut_phase(self, nom):
+        self._phases_ouvertes[nom] = time.perf_counter()
+
+    def fin_phase(self, nom):
+        debut = self._phases_ouvertes.pop(nom, None)
+        if debut is None:
+            return
+        duree = time.perf_counter() - debut
+        with self._verrou:
+            stats = self.phases.setdefault(nom, {"n": 0, "total_s": 0.0, "max_s": 0.0})
+            stats["n"] += 1
+            stats["total_s"] += duree
+            stats["max_s"] = max(stats["max_s"], duree)
+            self.dernier_rerun[nom] = self.dernier_rerun.get(nom, 0.0) + duree
+
+    @contextmanager
+    def phase(self, nom):
+        self.debut_phase(nom)
+        try:
+            yield
+        finally:
+            self.fin_phase(nom)
+
+    # --- APPELS API ---
+
+    def chronometrer_appel(self, methode, fonction, *args, **kwargs):
+        """Exécute un appel API en mesurant sa durée et en le comptant dans le quota."""
+        type_quota = "ecriture" if methode in METHODES_ECRITURE else "lecture"
+        debut = time.perf_counter()
+        erreur_quota = False
+        try:
+            return fonction(*args, **kwargs)
+        except Exception as e:
+            erreur_quota = est_erreur_quota(e)
+            raise
+        finally:
+            duree = time.perf_counter() - debut
+            with self._verrou:
+                stats = self.appels.setdefault(methode, {"n": 0, "total_s": 0.0, "erreurs_quota": 0})
+                stats["n"] += 1
+                stats["total_s"] += duree
+                stats["erreurs_quota"] += int(erreur_quota)
+                self.appels_rerun += 1
+                self._horodatages[type_quota].append(time.monotonic())
+
+    def utilisation_quota(self):
+        """Part du quota par minute consommée sur les 60 dernières secondes : {"lecture": 0.25, "ecriture": 0.0}."""
+        maintenant = time.monotonic()
+        limites = {"lecture": QUOTA_LECTURE_PAR_MINUTE, "ecriture": QUOTA_ECRITURE_PAR_MINUTE}
+        utilisation = {}
+        with self._verrou:
+            for type_quota, horodatages in self._horodatages.items():
+                while horodatages and maintenant - horodatages[0] > 60:
+                    horodatages.popleft()
+                utilisation[type_quota] = round(len(horodatages) / limites[type_quota], 3)
+        return utilisation
+
+    @property
+    def total_appels(self):
+        return sum(stats["n"] for stats in self.appels.values())
+
+    # --- EXPORTS ---
+
+    def resume(self):
+        """Instantané sérialisable (JSON) de toutes les mesures de la session."""
+        utilisation_quota = self.utilisation_quota()
+        with self._verrou:
+            return {
+                "session": self.session,
+                "reruns": self.reruns,
+                "dernier_rerun_ms": {nom: round(d * 1000, 2) for nom, d in self.dernier_rerun.items()},
+                "appels_dernier_rerun": self.appels_rerun,
+                "phases": {nom: dict(stats) for nom, stats in self.phases.items()},
+                "appels_api": {methode: dict(stats) for methode, stats in self.appels.items()},
+                "utilisation_quota": utilisation_quota,
+            }
+
+    def vers_json(self):
+        return json.dumps(self.resume(), ensure_ascii=False)
+
+    def journaliser(self, interrompu=False):
+        """Écrit le résumé sous forme de log structuré (une ligne JSON) sur le logger 'sebapp.perf'."""
+        if logger.isEnabledFor(logging.INFO):
+            resume = self.resume()
+            resume["interrompu"] = interrompu
+            logger.info(json.dumps(resume, ensure_ascii=False))
+
+    def vers_prometheus(self):
+        """Export au format texte Prometheus (exposition 0.0.4)."""
+        resume = self.resume()
+        session = resume["session"]
+        lignes = [
+            "# HELP sebapp_reruns_total Nombre d'exécutions du script pour la session.",
+            "# TYPE sebapp_reruns_total counter",
+            f'sebapp_reruns_total{{session="{session}"}} {resume["reruns"]}',
+            "# HELP sebapp_phase_secondes_total Temps cumulé passé dans chaque phase d'un rerun.",
+            "# TYPE sebapp_phase_secondes_total counter",
+        ]
+        lignes += [f'sebapp_phase_secondes_total{{session="{session}",phase="{nom}"}} {stats["total_s"]:.6f}'
+                   for nom, stats in resume["phases"].items()]
+        lignes += ["# HELP sebapp_phase_total Nombre d'exécutions de chaque phase.", "# TYPE sebapp_phase_total counter"]
+        lignes += [f'sebapp_phase_total{{session="{session}",phase="{nom}"}} {stats["n"]}'
+                   for nom, stats in resume["phases"].items()]
+        lignes += ["# HELP sebapp_api_appels_total Appels à l'API Google Sheets.", "# TYPE sebapp_api_appels_total counter"]
+        lignes += [f'sebapp_api_appels_total{{session="{session}",methode="{m}"}} {stats["n"]}'
+                   for m, stats in resume["appels_api"].items()]
+        lignes += ["# HELP sebapp_api_secondes_total Temps cumulé des appels à l'API Google Sheets.",
+                   "# TYPE sebapp_api_secondes_total counter"]
+        lignes += [f'sebapp_api_secondes_total{{session="{session}",methode="{m}"}} {stats["total_s"]:.6f}'
+                   for m, stats in resume["appels_api"].items()]
+        lignes += ["# HELP sebapp_api_erreurs_quota_total Appels refusés pour dépassement de quota (429).",
+                   "# TYPE sebapp_api_erreurs_quota_total counter"]
+        lignes += [f'sebapp_api_erreurs_quota_total{{session="{session}",methode="{m}"}} {stats["erreurs_quota"]}'
+                   for m, stats in resume["appels_api"].items()]
+        lignes += ["# HELP sebapp_quota_utilisation Part du quota par minute consommée sur les 60 dernières secondes.",
+                   "# TYPE sebapp_quota_utilisation gauge"]
+        lignes += [f'sebapp_quota_utilisation{{session="{session}",type="{t}"}} {u}'
+                   for t, u in resume["utilisation_quota"].items()]
+        return "\n".join(lignes) + "\n"
+
+
+class FeuilleInstrumentee:
+    """
+    Enveloppe une feuille (ou un classeur) gspread : les appels API passent par mesures.chronometrer_appel,
+    tout le reste est transmis tel quel. Le classeur (.spreadsheet) et les feuilles qu'il retourne
+    sont eux aussi enveloppés, pour compter les appels de l'archivage.
+    """
+
+    def __init__(self, cible, mesures):
+        self._cible = cible
+        self._mesures = mesures
+
+    def __getattr__(self, nom):
+        attribut = getattr(self._cible, nom)
+        if nom in ("spreadsheet", "sheet1"):
+            return FeuilleInstrumentee(attribut, self._mesures)
+        if nom not in METHODES_API:
+            return attribut
+
+        def appel(*args, **kwargs):
+            resultat = self._mesures.chronometrer_appel(nom, attribut, *args, **kwargs)
+            if nom not in METHODES_FEUILLES:
+                return resultat
+            if isinstance(resultat, list):
+                return [FeuilleInstrumentee(feuille, self._mesures) for feuille in resultat]
+            return FeuilleInstrumentee(resultat, self._mesures)
+        return appel
@@ -0,0 +1,223 @@
+"""
+Génération en lot des rapports d'intervention et des factures (PDF), pour la fin de mois.
+
+Comme donnees.py, ce module ne dépend pas de Streamlit : il est utilisé par la page
+"🧾 Rapports & Factures" de gestion.py et peut être lancé en ligne de commande :
+    python rapports.py --debut 2025-01-01 --fin 2025-01-31 --nature facture --sortie factures_janvier.zip
+
+Le rendu des PDF est réparti sur tous les cœurs (ProcessPoolExecutor). Les documents sont écrits
+dans le zip (ou le dossier) au fur et à mesure : seuls quelques lots sont en mémoire à la fois.
+"""
+import argparse
+import multiprocessing
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import donnees
+
+NATURES = {"rapport": "Rapport d'intervention", "facture": "Facture"}
+ENTREPRISE = "SEBApp - Chauffagiste"
+# Nombre de documents rendus par tâche envoyée à un processus (limite le coût des échanges entre processus)
+DOCUMENTS_PAR_LOT = 25
+
+
+# --- SÉLECTION ---
+
+def selectionner_interventions(db, date_debut, date_fin, archives=None):
+    """
+    Interventions dont la date ('AAAA-MM-JJ') est comprise entre date_debut et date_fin (incluses),
+    triées par date. archives : {annee: {nom_complet: [interventions]}} (cf. donnees.charger_archive_annee),
+    pour inclure des années déjà archivées. Une intervention présente à la fois dans la feuille principale
+    et dans une archive (archivage interrompu) n'est retenue qu'une fois, la feuille principale prévalant :
+    même identifiant, ou même contenu pour le même client (une copie a pu recevoir un autre identifiant ;
+    deux interventions identiques d'une même source restent distinctes).
+    Chaque document contient les informations du client, l'intervention et un numéro 'AAAAMM-<id>'
+    tiré de l'identifiant enregistré avec l'intervention : il ne dépend pas de la période choisie et ne
+    change pas d'une génération à l'autre. Ce numéro identifie l'intervention de façon unique ; ce n'est PAS
+    une numérotation continue et chronologique (sans trou) : suffisant pour ces documents, pas pour une
+    facturation qui l'exigerait. Une intervention sans identifiant a pour numéro None (voir
+    donnees.attribuer_identifiants, à lancer avant la génération).
+    """
+    debut, fin = str(date_debut), str(date_fin)
+    sources = [{nom_complet: client_data['historique'] for nom_complet, client_data in db.items()}]
+    sources += list((archives or {}).values())
+
+    documents = []
+    ids_vus, contenus_vus = set(), set() # contenus des sources précédentes seulement
+    for source in sources:
+        contenus_source = set()
+        for nom_complet, historique in source.items():
+            client_data = db.get(nom_complet, {"nom": nom_complet, "prenom": ""})
+            for inter in historique:
+                date_inter = str(inter.get('date', ''))
+                if debut <= date_inter <= fin:
+                    contenu = (nom_complet, donnees.cle_intervention(inter))
+                    if inter.get('id') in ids_vus or contenu in contenus_vus:
+                        continue
+                    if inter.get('id'):
+                        ids_vus.add(inter['id'])
+                    contenus_source.add(contenu)
+                    documents.append({
+                        "client": {champ: client_data.get(champ, '') for champ in
+                                   ("nom", "prenom", "adresse", "code_postal", "ville", "telephone", "email", "equipement")},
+                        "intervention": inter,
+                        "numero": f"{date_inter[:7].replace('-', '')}-{inter['id']}" if inter.get('id') else None,
+                    })
+        contenus_vus |= contenus_source
+
+    documents.sort(key=lambda d: (d["intervention"]["date"], d["client"]["nom"], d["numero"] or ""))
+    return documents
+
+def annees_concernees(annees_archivees, date_debut, date_fin):
+    """
+    Années archivées qui recoupent la période (à charger avec donnees.charger_archive_annee).
+    annees_archivees : résultat de donnees.lister_annees_archivees (à mémoriser pour éviter un appel API à chaque fois).
+    """
+    return [annee for annee in annees_archivees if int(str(date_debut)[:4]) <= annee <= int(str(date_fin)[:4])]
+
+
+# --- RENDU PDF ---
+
+def _texte(valeur):
+    """Les polices PDF standard ne couvrent que le latin-1 : on remplace le reste (€, emojis...)."""
+    texte = str(valeur if valeur is not None else '').replace("€", "EUR")
+    return texte.encode("latin-1", "replace").decode("latin-1")
+
+def nom_fichier(document, nature):
+    client = re.sub(r'[^A-Za-z0-9]+', '_', f"{document['client']['nom']}_{document['client']['prenom']}").strip('_')
+    return f"{nature}_{document['numero']}_{client}.pdf"
+
+def generer_pdf(document, nature):
+    """Rend un rapport ou une facture et retourne le contenu du PDF (bytes)."""
+    from fpdf import FPDF # Import local : la sélection et la CLI n'en ont pas besoin
+
+    client, inter = document["client"], document["intervention"]
+    pdf = FPDF(format="A4")
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+
+    pdf.set_font("Helvetica", "B", 16)
+    pdf.cell(0, 10, _texte(f"{NATURES[nature]} n° {document['numero']}"), new_x="LMARGIN", new_y="NEXT")
+    pdf.set_font("Helvetica", "", 10)
+    pdf.cell(0, 6, _texte(ENTREPRISE), new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(6)
+
+    pdf.set_font("Helvetica", "B", 12)
+    pdf.cell(0, 8, "Client", new_x="LMARGIN", new_y="NEXT")
+    pdf.set_font("Helvetica", "", 11)
+    for ligne in (
+        f"{client['nom']} {client['prenom']}".strip(),
+        client['adresse'],
+        f"{client['code_postal']} {client['ville']}".strip(),
+        f"Tél. : {client['telephone']}" if client['telephone'] else "",
+        f"Email : {client['email']}" if client['email'] else "",
+        f"Équipement : {client['equipement']}" if client['equipement'] else "",
+    ):
+        if ligne:
+            pdf.cell(0, 6, _texte(ligne), new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(6)
+
+    pdf.set_font("Helvetica", "B", 12)
+    pdf.cell(0, 8, "Intervention", new_x="LMARGIN", new_y="NEXT")
+    pdf.set_font("Helvetica", "", 11)
+    pdf.cell(0, 6, _texte(f"Date : {inter.get('date', '')}"), new_x="LMARGIN", new_y="NEXT")
+    pdf.cell(0, 6, _texte(f"Type : {inter.get('type', 'N/A')}"), new_x="LMARGIN", new_y="NEXT")
+    pdf.cell(0, 6, _texte(f"Technicien(s) : {', '.join(inter.get('techniciens', [])) or 'N/A'}"), new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(2)
+    pdf.multi_cell(0, 6, _texte(inter.get('desc', '')), new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(6)
+
+    pdf.set_font("Helvetica", "B", 12)
+    libelle = "Montant à régler" if nature == "facture" else "Prix"
+    pdf.cell(0, 8, _texte(f"{libelle} : {float(inter.get('prix', 0) or 0):.2f} €"), new_x="LMARGIN", new_y="NEXT")
+
+    return bytes(pdf.output())
+
+def _rendre_lot(documents, nature):
+    """Tâche exécutée dans un processus : rend un lot de documents -> [(nom_fichier, pdf)]."""
+    return [(nom_fichier(document, nature), generer_pdf(document, nature)) for document in documents]
+
+
+# --- GÉNÉRATION EN LOT ---
+
+def generer_lot(documents, sortie, nature="rapport", processus=None, progression=None):
+    """
+    Rend tous les documents en parallèle et les écrit dans `sortie` :
+    un fichier .zip, ou un dossier (créé si besoin) pour tout autre chemin.
+    Le nombre de lots en cours est limité à 2 par processus : les PDF sont écrits dès qu'ils
+    arrivent, la mémoire ne dépend donc pas du nombre de documents.
+    progression(faits, total) est appelée après chaque lot. Retourne le nombre de documents écrits.
+    """
+    if nature not in NATURES:
+        raise ValueError(f"Nature inconnue : {nature} (attendu : {', '.join(NATURES)})")
+    sans_numero = sum(1 for document in documents if document["numero"] is None)
+    if sans_numero:
+        raise ValueError(f"{sans_numero} intervention(s) sans identifiant : lancer donnees.attribuer_identifiants avant la génération.")
+
+    processus = processus or os.cpu_count() or 1
+    lots = [documents[i:i + DOCUMENTS_PAR_LOT] for i in range(0, len(documents), DOCUMENTS_PAR_LOT)]
+
+    en_zip = str(sortie).lower().endswith(".zip")
+    archive = zipfile.ZipFile(sortie, "w", compression=zipfile.ZIP_DEFLATED) if en_zip else None
+    if not en_zip:
+        os.makedirs(sortie, exist_ok=True)
+
+    faits = 0
+    try:
+        # 'spawn' : des processus neufs, qui n'héritent pas par fork des threads de Streamlit
+        # ni de la connexion gspread ouverte (fork d'un processus multithreadé = risque de blocage)
+        with ProcessPoolExecutor(max_workers=processus, mp_context=multiprocessing.get_context("spawn")) as executeur:
+            a_soumettre = iter(lots)
+            en_cours = set()
+            while True:
+                # On garde au plus 2 lots par processus en vol
+                for lot in a_soumettre:
+                    en_cours.add(executeur.submit(_rendre_lot, lot, nature))
+                    if len(en_cours) >= 2 * processus:
+                        break
+                if not en_cours:
+                    break
+                termines, en_cours = wait(en_cours, return_when=FIRST_COMPLETED)
+                for tache in termines:
+                    for nom, contenu in tache.result():
+                        if archive is not None:
+                            archive.writestr(nom, contenu)
+                        else:
+                            with open(os.path.join(sortie, nom), "wb") as f:
+                                f.write(contenu)
+                        faits += 1
+                    if progression is not None:
+                        progression(faits, len(documents))
+    finally:
+        if archive is not None:
+            archive.close()
+    return faits
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Génère les rapports d'intervention ou factures PDF d'une période.")
+    parser.add_argument("--debut", required=True, help="date de début incluse (AAAA-MM-JJ)")
+    parser.add_argument("--fin", required=True, help="date de fin incluse (AAAA-MM-JJ)")
+    parser.add_argument("--nature", choices=sorted(NATURES), default="rapport")
+    parser.add_argument("--sortie", required=True, help="fichier .zip ou dossier de destination")
+    parser.add_argument("--processus", type=int, default=None, help="nombre de processus (défaut : nombre de cœurs)")
+    args = parser.parse_args(argv)
+
+    sheet = donnees.obtenir_feuille()
+    # Les anciennes interventions reçoivent leur identifiant (donc leur numéro) avant la sélection
+    donnees.attribuer_identifiants(sheet)
+    db = donnees.charger_donnees(sheet)
+    archives = {annee: donnees.charger_archive_annee(sheet, annee)
+                for annee in annees_concernees(donnees.lister_annees_archivees(sheet), args.debut, args.fin)}
+    documents = selectionner_interventions(db, args.debut, args.fin, archives)
+
+    def afficher_progression(faits, total):
+        print(f"\r{faits}/{total} document(s)", end="", flush=True)
+
+    nb = generer_lot(documents, args.sortie, args.nature, args.processus, afficher_progression)
+    print(f"\n{nb} document(s) écrit(s) dans {args.sortie}")
+
+if __name__ == "__main__":
+    main()
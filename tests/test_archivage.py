@@ -0,0 +1,89 @@
+"""Archivage des anciennes interventions (donnees.archiver_interventions) sur la fausse feuille des benchmarks."""
+import json
+
+import donnees
+from benchmarks.fausse_feuille import FauxClasseur
+from benchmarks.generateurs import ENTETES, creer_feuille
+
+ECRITURES = {"update_cell", "append_row", "append_rows", "batch_update", "delete_rows", "add_worksheet"}
+
+
+def inter(date, desc):
+    return {"date": date, "type": "Entretien annuel", "techniciens": ["Seb"], "desc": desc, "prix": 100.0, "fichiers_inter": ""}
+
+def ligne_client(nom, prenom, historique):
+    return [nom, prenom, "1 rue des Lilas", "Lyon", "69000", "", "", "", json.dumps(historique), ""]
+
+def feuille_homonymes():
+    classeur = FauxClasseur()
+    return classeur.ajouter_feuille("Feuille 1", [
+        ENTETES,
+        ligne_client("Dupont", "Jean", [inter("2020-03-01", "jean 2020"), inter("2025-03-01", "jean 2025")]),
+        ligne_client("Dupont", "Marie", [inter("2020-04-01", "marie 2020"), inter("2025-04-01", "marie 2025")]),
+    ])
+
+def descriptions(historique):
+    return sorted(h["desc"] for h in historique)
+
+
+def test_homonymes_chacun_garde_son_historique():
+    sheet = feuille_homonymes()
+    db = donnees.charger_donnees(sheet)
+
+    assert donnees.archiver_interventions(sheet, db, 2024) == 2
+
+    db = donnees.charger_donnees(sheet)
+    assert descriptions(db["Dupont Jean"]["historique"]) == ["jean 2025"]
+    assert descriptions(db["Dupont Marie"]["historique"]) == ["marie 2025"]
+    archive = donnees.charger_archive_annee(sheet, 2020)
+    assert descriptions(archive["Dupont Jean"]) == ["jean 2020"]
+    assert descriptions(archive["Dupont Marie"]) == ["marie 2020"]
+    assert "find" not in sheet.spreadsheet.appels
+
+
+def test_ecritures_groupees():
+    sheet = creer_feuille(300, 10)
+    db = donnees.charger_donnees(sheet)
+    a_archiver = donnees.preparer_archivage(db, 2100)
+    sheet.spreadsheet.reinitialiser_compteurs()
+
+    donnees.archiver_interventions(sheet, db, 2100)
+
+    appels = sheet.spreadsheet.appels
+    nb_annees = len(a_archiver)
+    # Par année : création de la feuille, en-tête, append_rows ; puis un batch_update de la feuille principale
+    assert sum(n for methode, n in appels.items() if methode in ECRITURES) <= 3 * nb_annees + 1
+    assert "find" not in appels and "update_cell" not in appels
+    assert all(not c["historique"] for c in donnees.charger_donnees(sheet).values())
+
+
+def test_reprise_apres_interruption_sans_reecrire_les_archives():
+    sheet = feuille_homonymes()
+    db = donnees.charger_donnees(sheet)
+    donnees.archiver_interventions(sheet, db, 2024)
+
+    # Simule une interruption entre l'écriture des archives et l'allègement de la feuille principale
+    sheet.update_cell(2, donnees.COL_HISTORIQUE, json.dumps([inter("2020-03-01", "jean 2020"), inter("2025-03-01", "jean 2025")]))
+    archive = sheet.spreadsheet.worksheet(f"{donnees.ARCHIVE_PREFIXE}2020")
+    sheet.spreadsheet.reinitialiser_compteurs()
+
+    db = donnees.charger_donnees(sheet)
+    assert donnees.archiver_interventions(sheet, db, 2024) == 1
+
+    appels = sheet.spreadsheet.appels
+    assert appels["batch_update"] == 1 and "append_rows" not in appels # archive inchangée : pas réécrite
+    assert descriptions(donnees.charger_donnees(sheet)["Dupont Jean"]["historique"]) == ["jean 2025"]
+    assert descriptions(donnees.charger_archive_annee(sheet, 2020)["Dupont Jean"]) == ["jean 2020"]
+    assert len(archive.get_all_records()) == 2
+
+
+def test_attribuer_identifiants_feuille_principale_et_archives():
+    sheet = feuille_homonymes()
+    donnees.archiver_interventions(sheet, donnees.charger_donnees(sheet), 2024)
+
+    assert donnees.attribuer_identifiants(sheet) == 4
+    assert donnees.attribuer_identifiants(sheet) == 0 # déjà migré : aucune écriture
+
+    ids = [h["id"] for c in donnees.charger_donnees(sheet).values() for h in c["historique"]]
+    ids += [h["id"] for inters in donnees.charger_archive_annee(sheet, 2020).values() for h in inters]
+    assert len(set(ids)) == 4
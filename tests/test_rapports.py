@@ -0,0 +1,34 @@
+"""Sélection des interventions à facturer (rapports.selectionner_interventions), sans rendu PDF."""
+import rapports
+
+
+def inter(id_, date, desc):
+    return {"id": id_, "date": date, "type": "Dépannage", "techniciens": ["Seb"], "desc": desc, "prix": 90.0}
+
+def client(nom, prenom, historique):
+    return {"nom": nom, "prenom": prenom, "adresse": "", "code_postal": "", "ville": "", "telephone": "",
+            "email": "", "equipement": "", "historique": historique}
+
+
+def test_copie_archivee_retenue_une_seule_fois():
+    db = {"Dupont Jean": client("Dupont", "Jean", [inter("a1", "2023-02-01", "fuite"), inter("a2", "2023-02-03", "purge")])}
+    # Archivage interrompu : même identifiant pour l'une, identifiant différent (même contenu) pour l'autre
+    archives = {2023: {"Dupont Jean": [inter("a1", "2023-02-01", "fuite"), inter("zz", "2023-02-03", "purge")]}}
+
+    documents = rapports.selectionner_interventions(db, "2023-01-01", "2023-12-31", archives)
+
+    assert [d["numero"] for d in documents] == ["202302-a1", "202302-a2"]
+
+
+def test_interventions_identiques_d_une_meme_source_conservees():
+    db = {"Dupont Jean": client("Dupont", "Jean", [inter("b1", "2023-02-01", "visite"), inter("b2", "2023-02-01", "visite")])}
+
+    documents = rapports.selectionner_interventions(db, "2023-02-01", "2023-02-01")
+
+    assert [d["numero"] for d in documents] == ["202302-b1", "202302-b2"]
+
+
+def test_intervention_sans_identifiant_sans_numero():
+    db = {"Dupont Jean": client("Dupont", "Jean", [{"date": "2023-02-01", "desc": "ancienne"}])}
+
+    assert rapports.selectionner_interventions(db, "2023-01-01", "2023-12-31")[0]["numero"] is None